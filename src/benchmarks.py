@@ -0,0 +1,902 @@
+
+# benchmarks for the interpreter
+# run with: python benchmarks.py <benchmark> [options]
+
+# imports
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from interpreterProj import (
+    INLINE_NODES,
+    VECTOR_MIN_NODES,
+    TEST_PARTS,
+    TEST_TAIL_CALLS,
+    Interpreter,
+    Lexer,
+    Parser,
+    VM,
+    Profiler,
+    compile_bytecode,
+    count_nodes,
+    dump_bytecode,
+    interpret_parallel,
+    load_bytecode,
+    tokenize,
+)
+
+
+# generates a plain expression (no Defun and no ;) with the given number of
+# terms, mixing every operator level so the lexer has to order all of them
+def generate_expression(terms, seed=0):
+    rng = random.Random(seed)
+    parts = [str(rng.randint(1, 99))]
+    for _ in range(terms - 1):
+        kind = rng.random()
+        if kind < 0.6:
+            parts.append(rng.choice(["+", "-", "*", "/", "%"]))
+            parts.append(str(rng.randint(1, 99)))
+        elif kind < 0.8:
+            parts.append(rng.choice(["+", "-"]))
+            parts.append(f"({rng.randint(1, 99)} * -{rng.randint(1, 99)})")
+        elif kind < 0.9:
+            parts.append(rng.choice(["+", "-"]))
+            parts.append(
+                f"({rng.randint(1, 99)} {rng.choice(['==', '!=', '<', '>='])} "
+                f"{rng.randint(1, 99)} {rng.choice(['&&', '||'])} "
+                f"{rng.choice(['True', 'False', 'not False'])})"
+            )
+        else:
+            # python chains a < b < c and a && b && c, of which the lexer only
+            # keeps the first two operands
+            parts.append(rng.choice(["+", "-"]))
+            operator = rng.choice(["<", ">=", "&&", "||"])
+            operands = [str(rng.randint(1, 99)) for _ in range(rng.randint(3, 5))]
+            if operator in ("&&", "||"):
+                operands[-1] = "lambd (x) (x)"
+            parts.append("(" + f" {operator} ".join(operands) + ")")
+    return " ".join(parts)
+
+
+def lexer_tokens(lexer):
+    tokens = []
+    token = lexer.get_next_token()
+    while token is not None:
+        tokens.append((token.type, token.value))
+        token = lexer.get_next_token()
+    return tokens
+
+
+# generates the text of a .lambda file with the given number of statements
+def generate_program(statements, seed=0):
+    rng = random.Random(seed)
+    lines = [
+        "Defun (Add,a,b)a+b;",
+        "Defun (Factorial, n)(n == 1) or (n * Factorial(n - 1));",
+        "Defun (countdown,n)(n==0) or (countdown(n-1));",
+    ]
+    for i in range(statements - len(lines)):
+        kind = rng.random()
+        if kind < 0.2:
+            lines.append(f"Defun (F{i},a,b) (a * {rng.randint(1, 99)}) - b % 7;")
+        elif kind < 0.6:
+            lines.append(f"Add({rng.randint(1, 999)},{rng.randint(1, 999)});")
+        else:
+            # inside one text only calls at the start of a statement parse,
+            # a call in an expression needs the function defined beforehand
+            lines.append(f"Add(Factorial({rng.randint(1, 20)}),{rng.randint(1, 999)});")
+    return "\n".join(lines)
+
+
+def count_tokens(lexer):
+    count = 0
+    while lexer.get_next_token() is not None:
+        count += 1
+    return count
+
+
+def best_time(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+# compares the single pass lexer with the OrderParanthText() round-trip
+def bench_lexer(sizes, repeat):
+    # the older path recurses once per operation of the expression
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 10 * max(sizes) + 1000))
+
+    print(f"{'terms':>8} {'tokens':>9} {'ast tok/s':>12} {'1-pass tok/s':>13} {'speedup':>8}")
+    for terms in sizes:
+        text = generate_expression(terms)
+        if lexer_tokens(Lexer(text)) != lexer_tokens(Lexer(text, single_pass=False)):
+            print(f"{terms:>8} the two lexer modes do not agree on this expression")
+            continue
+        tokens = count_tokens(Lexer(text))
+
+        old = best_time(lambda: count_tokens(Lexer(text, single_pass=False)), repeat)
+        new = best_time(lambda: count_tokens(Lexer(text)), repeat)
+        print(
+            f"{terms:>8} {tokens:>9} {tokens / old:>12.0f} {tokens / new:>13.0f} {old / new:>7.2f}x"
+        )
+
+
+# tokens per second of tokenize() on growing .lambda texts, a flat rate means
+# the time grows linearly with the size of the file
+def bench_tokenize(sizes, repeat):
+    token = next(tokenize("x"))
+    print(f"bytes per IDENTIFIER token: {sys.getsizeof(token)} (+ its lexeme)")
+    print(f"{'statements':>10} {'chars':>10} {'tokens':>10} {'tok/s':>10}")
+    for statements in sizes:
+        text = generate_program(statements)
+        tokens = sum(1 for _ in tokenize(text))
+        elapsed = best_time(lambda: sum(1 for _ in tokenize(text)), repeat)
+        print(f"{statements:>10} {len(text):>10} {tokens:>10} {tokens / elapsed:>10.0f}")
+
+
+# hands the parser tokens that were read beforehand, so only parsing is timed
+class ListLexer:
+    def __init__(self, tokens):
+        self.tokens = iter(tokens)
+        self.current_char = None
+
+    def get_next_token(self):
+        return next(self.tokens, None)
+
+
+def read_tokens(text):
+    lexer = Lexer(text)
+    tokens = []
+    token = lexer.get_next_token()
+    while token is not None:
+        tokens.append(token)
+        token = lexer.get_next_token()
+    return tokens
+
+
+def parser_workloads(size):
+    return {
+        "flat sum in Defun": "Defun (S,a) a" + " + 1" * size,
+        "flat sum expression": " + ".join(["1"] * size),
+        "nested parenthesis": "Defun (P,a) " + "(" * size + "a" + ")" * size,
+        "nested calls": "Defun (N,a) " + "Add(" * size + "a" + ",1)" * size,
+    }
+
+
+# parse time of very long and very deep expressions, the time per token
+# should stay flat as the size grows and no size should hit the recursion limit
+def bench_parser(sizes, repeat):
+    interpreter = Interpreter()
+    interpreter.interpret(Parser(Lexer("Defun (Add,a,b)a+b"), interpreter).parse())
+
+    print(f"{'workload':<22} {'size':>7} {'tokens':>8} {'seconds':>9} {'us/token':>9}")
+    for size in sizes:
+        for name, text in parser_workloads(size).items():
+            tokens = read_tokens(text)
+            elapsed = best_time(
+                lambda: Parser(ListLexer(tokens), interpreter).parse(), repeat
+            )
+            print(
+                f"{name:<22} {size:>7} {len(tokens):>8} {elapsed:>9.4f} {elapsed / len(tokens) * 1e6:>9.2f}"
+            )
+
+
+# memory the parsed AST of generated programs keeps alive, per node. tokens
+# and other garbage of the parse are freed before the second snapshot
+def bench_memory(sizes):
+    print(f"{'statements':>10} {'nodes':>10} {'bytes':>12} {'bytes/node':>11}")
+    for statements in sizes:
+        text = generate_program(statements)
+        interpreter = Interpreter()
+        interpreter.interpret(Parser(Lexer(";".join(text.split(";")[:3])), interpreter).parse())
+
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        tree = Parser(Lexer(text), interpreter).parse()
+        size = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+
+        nodes = count_nodes(tree)
+        print(f"{statements:>10} {nodes:>10} {size:>12} {size / nodes:>11.1f}")
+
+
+# a Defun that calls itself twice per step, so without memoization it makes
+# 2^n calls and with it n + 1 distinct ones
+def bench_memo(sizes, repeat):
+    definition = "Defun (Twice,n)(n==0) or (Twice(n-1) + Twice(n-1) + 1)"
+
+    print(f"{'n':>4} {'result':>10} {'plain s':>9} {'memo s':>9} {'speedup':>9} {'hits':>6} {'misses':>7}")
+    for n in sizes:
+        times = []
+        for memoize in (False, True):
+            interpreter = Interpreter(memoize=memoize)
+            interpreter.interpret(Parser(Lexer(definition), interpreter).parse())
+            statements = Parser(Lexer(f"Twice({n})"), interpreter).parse()
+
+            # every run gets an empty memo table, otherwise only the first one
+            # would compute anything
+            def run():
+                for table in interpreter.memo_tables.values():
+                    table.entries.clear()
+                return interpreter.interpret(statements)
+
+            result = run()
+            times.append(best_time(run, repeat))
+
+        stats = interpreter.memo_stats()["Twice"]
+        print(
+            f"{n:>4} {result[0]:>10} {times[0]:>9.4f} {times[1]:>9.6f} {times[0] / times[1]:>8.0f}x"
+            f" {stats['hits']:>6} {stats['misses']:>7}"
+        )
+
+
+# one Defun over many argument tuples: a formatted statement per tuple pushed
+# through the lexer and parser, call_many() and its numpy path. numpy x is the
+# numpy path against plain call_many(), below 1 where numpy loses; path says
+# whether vectorize=True used numpy or made the calls (VECTOR_MIN_NODES)
+def bench_batch(sizes, repeat):
+    interpreter = Interpreter()
+    for definition in (
+        "Defun (Add,a,b)a+b",
+        "Defun (Poly,x,y) (x * x * 3) + (x * y) - (y / 7) + (x % 5)",
+    ):
+        interpreter.interpret(Parser(Lexer(definition), interpreter).parse())
+
+    print(
+        f"{'function':<8} {'calls':>8} {'statements/s':>13} {'call_many/s':>12}"
+        f" {'numpy/s':>12} {'numpy x':>8} {'path':>6}"
+    )
+    for name in ("Add", "Poly"):
+        nodes = count_nodes(interpreter.global_env[name][1])
+        for calls in sizes:
+            rng = random.Random(calls)
+            arg_tuples = [(rng.randint(-999, 999), rng.randint(-999, 999)) for _ in range(calls)]
+
+            def statements():
+                for a, b in arg_tuples:
+                    text = f"{name}({a},{b})"
+                    interpreter.interpret(Parser(Lexer(text), interpreter).parse())
+
+            parsed = best_time(statements, repeat)
+            called = best_time(lambda: list(interpreter.call_many(name, arg_tuples)), repeat)
+            vectorized = best_time(
+                lambda: list(interpreter.call_many(name, arg_tuples, vectorize=True)), repeat
+            )
+            path = "numpy" if calls * nodes >= VECTOR_MIN_NODES else "calls"
+            print(
+                f"{name:<8} {calls:>8} {calls / parsed:>13.0f} {calls / called:>12.0f}"
+                f" {calls / vectorized:>12.0f} {called / vectorized:>7.2f}x {path:>6}"
+            )
+
+
+# the same file of independent calls run with 1 to N worker processes, each
+# call is a doubly recursive Defun so the work dominates the shipping
+def bench_parallel(max_workers, calls, depth, repeat):
+    definition = "Defun (Twice,n)(n==0) or (Twice(n-1) + Twice(n-1) + 1)"
+    text = definition + ";" + ";".join([f"Twice({depth})"] * calls)
+
+    print(f"{'workers':>7} {'seconds':>9} {'speedup':>8}")
+    serial = None
+    for workers in range(1, max_workers + 1):
+
+        def run():
+            interpreter = Interpreter()
+            statements = Parser(Lexer(text), interpreter).parse()
+            return interpret_parallel(statements, interpreter, workers)
+
+        elapsed = best_time(run, repeat)
+        if serial is None:
+            serial = elapsed
+        print(f"{workers:>7} {elapsed:>9.3f} {serial / elapsed:>7.2f}x")
+
+
+# wall time of starting a python process that imports the interpreter or runs
+# one expression through the command line, next to a bare python start
+def bench_startup(repeat):
+    here = os.path.dirname(os.path.abspath(__file__))
+    commands = {
+        "python -c pass": [sys.executable, "-c", "pass"],
+        "import interpreterProj": [sys.executable, "-c", "import interpreterProj"],
+        "interpreterProj.py -e 1+2": [sys.executable, "interpreterProj.py", "-e", "1+2"],
+    }
+
+    print(f"{'command':<28} {'ms':>8}")
+    for name, command in commands.items():
+        elapsed = best_time(
+            lambda: subprocess.run(command, cwd=here, check=True, stdout=subprocess.DEVNULL),
+            repeat,
+        )
+        print(f"{name:<28} {elapsed * 1000:>8.1f}")
+
+
+def latency_summary(name, latencies):
+    latencies = sorted(latencies)
+    mean = sum(latencies) / len(latencies)
+    p50 = latencies[len(latencies) // 2]
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    print(f"{name:<8} {mean * 1000:>9.2f} {p50 * 1000:>9.2f} {p95 * 1000:>9.2f}")
+
+
+# the latency of one request: a fresh process that is sent the definitions
+# again every time, against a warm server.py that defined them once
+def bench_server(requests):
+    here = os.path.dirname(os.path.abspath(__file__))
+    definitions = "Defun (Add,a,b)a+b; Defun (Factorial, n)(n == 1) or (n * Factorial(n - 1))"
+    calls = [f"Add(Factorial({i % 20 + 1}),{i})" for i in range(requests)]
+
+    print(f"{'mode':<8} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9}")
+    cold = []
+    for call in calls:
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "interpreterProj.py", "--no-cache", "-e", definitions, "-e", call],
+            cwd=here, check=True, stdout=subprocess.DEVNULL,
+        )
+        cold.append(time.perf_counter() - start)
+    latency_summary("cold", cold)
+
+    server = subprocess.Popen(
+        [sys.executable, "server.py", "--stdio"],
+        cwd=here, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True,
+    )
+    try:
+
+        def request(program):
+            server.stdin.write(json.dumps({"program": program}) + "\n")
+            server.stdin.flush()
+            return json.loads(server.stdout.readline())
+
+        request(definitions)
+        warm = []
+        for call in calls:
+            start = time.perf_counter()
+            request(call)
+            warm.append(time.perf_counter() - start)
+        latency_summary("warm", warm)
+    finally:
+        server.stdin.close()
+        server.wait()
+
+
+# the cost of the profiler: a run without one, which should be as fast as
+# before the profiler existed, against a run with one
+def bench_profile(sizes, repeat):
+    definition = "Defun (Twice,n)(n==0) or (Twice(n-1) + Twice(n-1) + 1)"
+
+    print(f"{'n':>4} {'calls':>9} {'off s':>9} {'on s':>9} {'overhead':>9}")
+    for n in sizes:
+        times = []
+        for profiler in (None, Profiler()):
+            interpreter = Interpreter(profiler=profiler)
+            interpreter.interpret(Parser(Lexer(definition), interpreter).parse())
+            statements = Parser(Lexer(f"Twice({n})"), interpreter).parse()
+            times.append(best_time(lambda: interpreter.interpret(statements), repeat))
+
+        calls = profiler.functions["Twice"].calls // repeat
+        print(f"{n:>4} {calls:>9} {times[0]:>9.4f} {times[1]:>9.4f} {times[1] / times[0]:>8.2f}x")
+
+
+# recursive arithmetic run by the closures and by the python functions of
+# codegen=True, the same statements give the same results in both
+def bench_codegen(repeat):
+    workloads = [
+        (["Defun (Twice,n)(n==0) or (Twice(n-1) + Twice(n-1) + 1)"], "Twice(16)"),
+        (["Defun (Factorial, n)(n == 1) or (n * Factorial(n - 1))"], "Factorial(150)"),
+        (["Defun (countdown,n)(n==0) or (countdown(n-1))"], "countdown(200000)"),
+        (
+            [
+                "Defun (Poly,x,y) (x * x * 3) + (x * y) - (y / 7) + (x % 5)",
+                "Defun (Sum,n)(n==0) or (Poly(n, n + 1) - Poly(n - 1, n) + Sum(n - 1))",
+            ],
+            "Sum(150)",
+        ),
+    ]
+
+    print(f"{'statement':<20} {'closures s':>11} {'codegen s':>10} {'speedup':>8}")
+    for definitions, statement in workloads:
+        times = []
+        results = []
+        for codegen in (False, True):
+            interpreter = Interpreter(codegen=codegen)
+            for definition in definitions:
+                interpreter.interpret(Parser(Lexer(definition), interpreter).parse())
+            statements = Parser(Lexer(statement), interpreter).parse()
+            results.append(interpreter.interpret(statements))
+            times.append(best_time(lambda: interpreter.interpret(statements), repeat))
+        if results[0] != results[1]:
+            print(f"{statement:<20} the two modes do not agree: {results[0]} {results[1]}")
+            continue
+        print(f"{statement:<20} {times[0]:>11.4f} {times[1]:>10.4f} {times[0] / times[1]:>7.1f}x")
+
+
+# the same recursive statements run by the tree walker, the closures and the
+# bytecode VM (from a program compiled beforehand), kept shallow enough for the
+# tree walker, then the time to get a program from its text against loading
+# it from a .lambdac file
+def bench_vm(repeat):
+    workloads = [
+        (["Defun (Twice,n)(n==0) or (Twice(n-1) + Twice(n-1) + 1)"], "Twice(12)"),
+        (["Defun (Factorial, n)(n == 1) or (n * Factorial(n - 1))"], "Factorial(100)"),
+        (["Defun (countdown,n)(n==0) or (countdown(n-1))"], "countdown(150)"),
+        (
+            [
+                "Defun (Poly,x,y) (x * x * 3) + (x * y) - (y / 7) + (x % 5)",
+                "Defun (Sum,n)(n==0) or (Poly(n, n + 1) - Poly(n - 1, n) + Sum(n - 1))",
+            ],
+            "Sum(100)",
+        ),
+    ]
+
+    print(f"{'statement':<16} {'walker s':>9} {'closures s':>11} {'vm s':>9} {'vm speedup':>11}")
+    for definitions, statement in workloads:
+        runs = []
+        for interpreter in (Interpreter(compiled=False), Interpreter(), VM()):
+            for definition in definitions:
+                interpreter.interpret(Parser(Lexer(definition), interpreter).parse())
+            statements = Parser(Lexer(statement), interpreter).parse()
+            if isinstance(interpreter, VM):
+                program = compile_bytecode(statements)
+                run = lambda: interpreter.run(program)
+            else:
+                run = lambda: interpreter.interpret(statements)
+            runs.append((run(), best_time(run, repeat)))
+        if len({repr(result) for result, _ in runs}) != 1:
+            print(f"{statement:<16} the three do not agree: {[result for result, _ in runs]}")
+            continue
+        (_, walker), (_, closures), (_, vm) = runs
+        print(f"{statement:<16} {walker:>9.4f} {closures:>11.4f} {vm:>9.4f} {walker / vm:>10.1f}x")
+
+    print()
+    print(f"{'statements':>10} {'parse s':>9} {'load s':>9} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "program.lambdac")
+        for size in (1000, 10000):
+            text = generate_program(size)
+            vm = VM()
+            vm.interpret(Parser(Lexer(";".join(text.split(";")[:3])), vm).parse())
+            parse = lambda: compile_bytecode(Parser(Lexer(text), vm).parse())
+            dump_bytecode(parse(), path)
+            parsed = best_time(parse, repeat)
+            loaded = best_time(lambda: load_bytecode(path), repeat)
+            print(f"{size:>10} {parsed:>9.4f} {loaded:>9.4f} {parsed / loaded:>7.1f}x")
+
+
+# recursive predicates whose && and || operands are all bools, run strict and
+# with short_circuit=True: the calls made (counted by a Profiler, timed without
+# one) and how many of them short-circuiting avoided
+def bench_short_circuit(repeat):
+    workloads = [
+        (
+            [
+                "Defun (Reach,n) (n == 0) or "
+                "(((n % 50) == 1) || ((Reach(n - 1) == True) || (Reach(n - 1) == True)))"
+            ],
+            "Reach(16)",
+        ),
+        (
+            [
+                "Defun (Both,n) (n == 0) or "
+                "((n > 0) && ((Both(n - 1) == True) && (Both(n - 1) == True)))"
+            ],
+            "Both(16)",
+        ),
+        (["Defun (Never,n) (n == 0) or (((n % 2) == 5) && (Never(n - 1) == True))"], "Never(60)"),
+    ]
+
+    print(
+        f"{'statement':<11} {'strict calls':>13} {'short calls':>12} {'avoided':>8} "
+        f"{'strict s':>9} {'short s':>9} {'speedup':>8}"
+    )
+    for definitions, statement in workloads:
+        calls = []
+        times = []
+        results = []
+        for short_circuit in (False, True):
+            profiler = Profiler()
+            for interpreter in (
+                Interpreter(profiler=profiler, short_circuit=short_circuit),
+                Interpreter(short_circuit=short_circuit),
+            ):
+                for definition in definitions:
+                    interpreter.interpret(Parser(Lexer(definition), interpreter).parse())
+                statements = Parser(Lexer(statement), interpreter).parse()
+                results.append(interpreter.interpret(statements))
+            calls.append(sum(function.calls for function in profiler.functions.values()))
+            times.append(best_time(lambda: interpreter.interpret(statements), repeat))
+        if len({repr(result) for result in results}) != 1:
+            print(f"{statement:<11} the two modes do not agree: {results}")
+            continue
+        print(
+            f"{statement:<11} {calls[0]:>13} {calls[1]:>12} {calls[0] - calls[1]:>8} "
+            f"{times[0]:>9.4f} {times[1]:>9.4f} {times[0] / times[1]:>7.1f}x"
+        )
+
+
+# calls whose arguments are expensive but not always read, evaluated eagerly
+# and with lazy=True: the calls made (counted by a Profiler, timed without
+# one). the last workload reads every argument, which shows what the thunks
+# cost when nothing is saved
+def bench_lazy(repeat):
+    twice = "Defun (Twice,n)(n==0) or (Twice(n-1) + Twice(n-1) + 1)"
+    workloads = [
+        ([twice, "Defun (Second,a,b) b + 0"], "Second(Twice(14), 1)"),
+        ([twice, "Defun (Down,n,x) (n == 0) or (Down(n - 1, Twice(8)))"], "Down(40, 0)"),
+        (["Defun (Factorial, n)(n == 1) or (n * Factorial(n - 1))"], "Factorial(100)"),
+    ]
+
+    print(
+        f"{'statement':<21} {'eager calls':>12} {'lazy calls':>11} "
+        f"{'eager s':>9} {'lazy s':>9} {'speedup':>8}"
+    )
+    for definitions, statement in workloads:
+        calls = []
+        times = []
+        results = []
+        for lazy in (False, True):
+            profiler = Profiler()
+            for interpreter in (
+                Interpreter(profiler=profiler, lazy=lazy),
+                Interpreter(lazy=lazy),
+            ):
+                for definition in definitions:
+                    interpreter.interpret(Parser(Lexer(definition), interpreter).parse())
+                statements = Parser(Lexer(statement), interpreter).parse()
+                results.append(interpreter.interpret(statements))
+            calls.append(sum(function.calls for function in profiler.functions.values()))
+            times.append(best_time(lambda: interpreter.interpret(statements), repeat))
+        if len({repr(result) for result in results}) != 1:
+            print(f"{statement:<21} the two modes do not agree: {results}")
+            continue
+        print(
+            f"{statement:<21} {calls[0]:>12} {calls[1]:>11} "
+            f"{times[0]:>9.4f} {times[1]:>9.4f} {times[0] / times[1]:>7.1f}x"
+        )
+
+
+# calls of small helpers, from the Add expressions of the test suite to
+# helpers called inside recursion, with every call made (inline=0) and with the
+# helpers inlined into their callers. the two modes take turns, so a slower
+# stretch of the machine does not land on one of them only
+def bench_inline(repeat):
+    add = "Defun (Add,a,b)a+b"
+    expressions = ";".join(
+        ["Add(Add(2,2),2)", "2-Add(Add(2,2),2)", "Add(2,Add(2,2))", "2-Add(2,Add(2,2))"] * 250
+    )
+    workloads = [
+        ("suite expressions", [add], expressions),
+        ("Dec in Loop(100000)", ["Defun (Dec,a)a - 1", "Defun (Loop,n)(n==0) or (Loop(Dec(n)))"], "Loop(100000)"),
+        (
+            "Poly in Sum(150)",
+            [
+                "Defun (Poly,x,y) (x * x * 3) + (x * y) - (y / 7) + (x % 5)",
+                "Defun (Sum,n)(n==0) or (Poly(n, n + 1) - Poly(n - 1, n) + Sum(n - 1))",
+            ],
+            "Sum(150)",
+        ),
+    ]
+
+    print(f"{'workload':<18} {'calls s':>9} {'inlined s':>10} {'speedup':>8}")
+    for name, definitions, statement in workloads:
+        runs = []
+        results = []
+        for inline in (0, INLINE_NODES):
+            interpreter = Interpreter(inline=inline)
+            for definition in definitions:
+                interpreter.interpret(Parser(Lexer(definition), interpreter).parse())
+            statements = Parser(Lexer(statement), interpreter).parse()
+            results.append(interpreter.interpret(statements))
+            runs.append((interpreter, statements))
+        if results[0] != results[1]:
+            print(f"{name:<18} the two modes do not agree: {results[0]} {results[1]}")
+            continue
+        times = [None, None]
+        for _ in range(repeat):
+            for i, (interpreter, statements) in enumerate(runs):
+                elapsed = best_time(lambda: interpreter.interpret(statements), 1)
+                if times[i] is None or elapsed < times[i]:
+                    times[i] = elapsed
+        print(f"{name:<18} {times[0]:>9.4f} {times[1]:>10.4f} {times[0] / times[1]:>7.2f}x")
+
+
+# the test suite of interpreterProj.py part by part, and generated workloads
+# scaled up from its cases. a workload is (setup, texts): the setup texts run
+# once beforehand, so a part can call the Defuns of the parts before it
+def suite_workloads(scale):
+    workloads = {}
+    setup = []
+    for i, part in enumerate(TEST_PARTS, 1):
+        workloads[f"suite part {i}"] = (list(setup), part)
+        setup += part
+
+    depth = 100 * scale
+    workloads[f"Factorial({depth})"] = (
+        ["Defun (Factorial, n)(n == 1) or (n * Factorial(n - 1))"],
+        [f"Factorial({depth})"],
+    )
+    workloads[f"repeat({depth * 20})"] = (
+        ["Defun (Add,a,b)a+b", "Defun (repeat,n)(n==0) or (repeat(n-1) , Add(1,1))"],
+        [f"repeat({depth * 20})"],
+    )
+    workloads[f"nested Add x{depth}"] = (
+        ["Defun (Add,a,b)a+b"],
+        ["Add(" * depth + "1" + ",1)" * depth],
+    )
+    workloads[f"arithmetic x{depth * 4}"] = ([], [generate_expression(depth * 4)])
+    return workloads
+
+
+# the three phases of a list of texts, each one timed on its own: the lexer
+# alone, the parser over tokens read beforehand and the interpreter over
+# statements parsed beforehand. a text that fails to lex or parse is timed up
+# to its error and left out of the later phases, as in the test suite
+def run_phases(texts, interpreter):
+    times = {}
+    start = time.perf_counter()
+    tokens = []
+    for text in texts:
+        try:
+            tokens.append(read_tokens(text))
+        except Exception:
+            pass
+    times["lex"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    parsed = []
+    for text_tokens in tokens:
+        try:
+            parsed.append(Parser(ListLexer(text_tokens), interpreter).parse())
+        except Exception:
+            pass
+    times["parse"] = time.perf_counter() - start
+
+    # the printed results and errors are part of the work, only not shown
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for statements in parsed:
+            try:
+                interpreter.interpret(statements)
+            except Exception:
+                pass
+    times["eval"] = time.perf_counter() - start
+    return times, sum(len(text_tokens) for text_tokens in tokens)
+
+
+def bench_suite(scale, warmup, repeat, save=None, compare=None, threshold=0.1):
+    # the generated recursion goes deeper than the default recursion limit
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 1000 * scale + 1000))
+
+    results = {}
+    print(f"best of {repeat} runs after {warmup} warmup runs, in ms")
+    print(f"{'workload':<22} {'tokens':>8} {'lex':>9} {'parse':>9} {'eval':>9}")
+    for name, (setup, texts) in suite_workloads(scale).items():
+        interpreter = Interpreter()
+        # repeat(-1) of the suite parts only ends with a cap
+        if name.startswith("suite part"):
+            interpreter.max_tail_calls = TEST_TAIL_CALLS
+        # a call inside an expression only parses once its Defun ran, so the
+        # texts are run one by one before the phases can be timed apart
+        with contextlib.redirect_stdout(io.StringIO()):
+            for text in setup + texts:
+                try:
+                    interpreter.interpret(Parser(Lexer(text), interpreter).parse())
+                except Exception:
+                    pass
+
+        for _ in range(warmup):
+            run_phases(texts, interpreter)
+        runs = {"lex": [], "parse": [], "eval": []}
+        for _ in range(repeat):
+            times, tokens = run_phases(texts, interpreter)
+            for phase, elapsed in times.items():
+                runs[phase].append(elapsed)
+
+        results[name] = {
+            phase: {"best": min(times), "median": statistics.median(times), "runs": times}
+            for phase, times in runs.items()
+        }
+        results[name]["tokens"] = tokens
+        print(
+            f"{name:<22} {tokens:>8}"
+            + "".join(f" {results[name][phase]['best'] * 1000:>9.3f}" for phase in runs)
+        )
+
+    if save is not None:
+        with open(save, "w") as file:
+            json.dump(
+                {
+                    "python": sys.version.split()[0],
+                    "scale": scale,
+                    "warmup": warmup,
+                    "repeat": repeat,
+                    "workloads": results,
+                },
+                file,
+                indent=2,
+            )
+        print(f"saved to {save}")
+
+    if compare is not None:
+        with open(compare, "r") as file:
+            baseline = json.load(file)
+        if baseline["scale"] != scale:
+            print(f"{compare} was run with --scale {baseline['scale']}, the sizes differ")
+        print(f"\ncompared with {compare}, slower by more than {threshold:.0%} is a regression")
+        print(f"{'workload':<22} {'phase':<6} {'before':>9} {'now':>9} {'ratio':>7}")
+        regressions = 0
+        for name, phases in results.items():
+            if name not in baseline["workloads"]:
+                continue
+            for phase in ("lex", "parse", "eval"):
+                before = baseline["workloads"][name][phase]["best"]
+                now = phases[phase]["best"]
+                ratio = now / before if before else 1.0
+                flag = ""
+                if ratio > 1 + threshold:
+                    flag = " regression"
+                    regressions += 1
+                print(
+                    f"{name:<22} {phase:<6} {before * 1000:>9.3f} {now * 1000:>9.3f} {ratio:>6.2f}x{flag}"
+                )
+        print(f"regressions: {regressions}")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="interpreter benchmarks")
+    benchmarks = arg_parser.add_subparsers(dest="benchmark", required=True)
+
+    lexer = benchmarks.add_parser(
+        "lexer", help="tokens per second of the two lexer modes"
+    )
+    lexer.add_argument(
+        "--sizes", type=int, nargs="+", default=[100, 1000, 5000, 20000]
+    )
+    lexer.add_argument("--repeat", type=int, default=3)
+
+    tokens = benchmarks.add_parser(
+        "tokenize", help="tokens per second of tokenize() on .lambda texts"
+    )
+    tokens.add_argument(
+        "--sizes", type=int, nargs="+", default=[1000, 10000, 100000]
+    )
+    tokens.add_argument("--repeat", type=int, default=3)
+
+    parser = benchmarks.add_parser(
+        "parser", help="parse time of long and deeply nested expressions"
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=3)
+
+    memo = benchmarks.add_parser(
+        "memo", help="a doubly recursive Defun with and without memoization"
+    )
+    memo.add_argument("--sizes", type=int, nargs="+", default=[12, 16, 20])
+    memo.add_argument("--repeat", type=int, default=3)
+
+    batch = benchmarks.add_parser(
+        "batch", help="one Defun over many argument tuples with call_many()"
+    )
+    batch.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 100000])
+    batch.add_argument("--repeat", type=int, default=3)
+
+    parallel = benchmarks.add_parser(
+        "parallel", help="a file of independent calls run with 1 to N workers"
+    )
+    parallel.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parallel.add_argument("--calls", type=int, default=200)
+    parallel.add_argument("--depth", type=int, default=12)
+    parallel.add_argument("--repeat", type=int, default=3)
+
+    startup = benchmarks.add_parser(
+        "startup", help="process start time of the interpreter and its command line"
+    )
+    startup.add_argument("--repeat", type=int, default=10)
+
+    server = benchmarks.add_parser(
+        "server", help="request latency of fresh processes against a warm server"
+    )
+    server.add_argument("--requests", type=int, default=50)
+
+    profile = benchmarks.add_parser(
+        "profile", help="run time of a recursive Defun with and without the profiler"
+    )
+    profile.add_argument("--sizes", type=int, nargs="+", default=[12, 16])
+    profile.add_argument("--repeat", type=int, default=3)
+
+    codegen = benchmarks.add_parser(
+        "codegen", help="recursive arithmetic run by closures and by generated python"
+    )
+    codegen.add_argument("--repeat", type=int, default=3)
+
+    vm = benchmarks.add_parser(
+        "vm", help="recursive statements run by the tree walker, the closures and the VM"
+    )
+    vm.add_argument("--repeat", type=int, default=3)
+
+    short_circuit = benchmarks.add_parser(
+        "short-circuit", help="calls avoided on recursive predicates by short-circuit && and ||"
+    )
+    short_circuit.add_argument("--repeat", type=int, default=3)
+
+    lazy = benchmarks.add_parser(
+        "lazy", help="calls with expensive unread arguments, eager and call-by-need"
+    )
+    lazy.add_argument("--repeat", type=int, default=3)
+
+    inline = benchmarks.add_parser(
+        "inline", help="calls of small helpers made and inlined"
+    )
+    inline.add_argument("--repeat", type=int, default=15)
+
+    memory = benchmarks.add_parser(
+        "memory", help="bytes the parsed AST of generated programs takes per node"
+    )
+    memory.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+
+    suite = benchmarks.add_parser(
+        "suite", help="lex, parse and eval time of the test suite and scaled-up workloads"
+    )
+    suite.add_argument(
+        "--scale", type=int, default=5, help="size of the generated workloads"
+    )
+    suite.add_argument("--warmup", type=int, default=1)
+    suite.add_argument("--repeat", type=int, default=5)
+    suite.add_argument("--save", metavar="FILE", help="write the results as a JSON baseline")
+    suite.add_argument("--compare", metavar="FILE", help="a JSON baseline to compare with")
+    suite.add_argument(
+        "--threshold", type=float, default=0.1,
+        help="how much slower than the baseline counts as a regression",
+    )
+
+    args = arg_parser.parse_args()
+    if args.benchmark == "lexer":
+        bench_lexer(args.sizes, args.repeat)
+    elif args.benchmark == "tokenize":
+        bench_tokenize(args.sizes, args.repeat)
+    elif args.benchmark == "parser":
+        bench_parser(args.sizes, args.repeat)
+    elif args.benchmark == "memo":
+        bench_memo(args.sizes, args.repeat)
+    elif args.benchmark == "batch":
+        bench_batch(args.sizes, args.repeat)
+    elif args.benchmark == "parallel":
+        bench_parallel(args.workers, args.calls, args.depth, args.repeat)
+    elif args.benchmark == "startup":
+        bench_startup(args.repeat)
+    elif args.benchmark == "server":
+        bench_server(args.requests)
+    elif args.benchmark == "profile":
+        bench_profile(args.sizes, args.repeat)
+    elif args.benchmark == "codegen":
+        bench_codegen(args.repeat)
+    elif args.benchmark == "vm":
+        bench_vm(args.repeat)
+    elif args.benchmark == "short-circuit":
+        bench_short_circuit(args.repeat)
+    elif args.benchmark == "lazy":
+        bench_lazy(args.repeat)
+    elif args.benchmark == "inline":
+        bench_inline(args.repeat)
+    elif args.benchmark == "memory":
+        bench_memory(args.sizes)
+    elif args.benchmark == "suite":
+        bench_suite(
+            args.scale, args.warmup, args.repeat, args.save, args.compare, args.threshold
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,27 @@
 
 # imports
+import argparse
+import array
 import ast
-from pickletools import StackObject
-from shutil import ExecError
+import contextlib
+import hashlib
+import io
+import itertools
+import json
+import marshal
+import mmap
+import operator
+import os
+import re
+import struct
+import time
+import zlib
+from collections import OrderedDict
 import sys
-from math import e, isnan
+
+# numpy is optional and slow to import, load_numpy() imports it the first time
+# Interpreter.call_many(vectorize=True) needs it
+numpy = None
 
 # EOF (end-of-file) token is used to indicate that
 # there is no more input left for lexical analysis
@@ -23,6 +40,50 @@ PUNCTUATIONS = {"(", ")", ",", "{", "}", ";"}
 
 ORFUNC = "ORFUNC"
 
+# how many calls in tail position one trampoline may jump to before it gives
+# up the same way a too deep python recursion does, None for no cap: a loop
+# written with Defun runs as long as it needs, and a runaway program (eg:
+# repeat(-1) never ends) is stopped by Interpreter.set_limits()
+MAX_TAIL_CALLS = None
+
+# how many steps a program with a timeout makes between two reads of the clock
+DEADLINE_CHECK_STEPS = 64
+
+# the largest magnitude the vectorized path of call_many() lets a value reach,
+# anything larger would overflow the int64 columns
+VECTOR_LIMIT = 2**63 - 1
+
+# call_many(vectorize=True) only uses numpy when the calls evaluate at least
+# this many nodes of the body in all (tuples * nodes), below it converting the
+# tuples costs more than the calls: Add(a,b) needs 256 tuples, Poly 46
+VECTOR_MIN_NODES = 768
+
+# the file loader runs the calls of a file in worker processes only from this
+# many statements on, below it starting the processes costs more than it saves
+PARALLEL_MIN_STATEMENTS = 1000
+
+# files larger than this are run statement by statement while they are read
+# (stream_program) instead of being parsed as a whole, and how much of such a
+# file is read at a time
+STREAM_MIN_BYTES = 64 * 1024 * 1024
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# how many results one memoized function keeps before the least recently used
+# one is dropped
+MEMO_SIZE = 10000
+
+# the largest body (in nodes, see count_nodes) of a non-recursive Defun the
+# closures compile right into the code of its calls
+INLINE_NODES = 20
+
+# part of the key of every cached program, to be raised whenever the parser
+# or the AST node classes change what a text is parsed into
+INTERPRETER_VERSION = "2"
+
+# where parsed .lambda files are cached and how many bytes the cache may use
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "newFuncLang")
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+
 (
     INTEGER,
     BOOLEAN,
@@ -62,6 +123,8 @@ ORFUNC = "ORFUNC"
 
 
 class Token(object):
+    __slots__ = ("type", "value")
+
     def __init__(self, type, value):
         self.type = type
         self.value = value
@@ -70,7 +133,53 @@ class Token(object):
         return "Token({type}, {value})".format(type=self.type, value=repr(self.value))
 
     def __repr__(self):
-        return self._str_()
+        return self.__str__()
+
+
+# one compiled pattern finds the next lexeme, the name of the group that
+# matched says which kind it is and the lexeme is a slice of the text
+TOKEN_PATTERN = re.compile(
+    r"(?P<SPACE>\s+)"
+    r"|(?P<INTEGER>\d+)"
+    r"|(?P<WORD>[^\W\d_][^\W_]*)"
+    r"|(?P<SYMBOL>==|!=|>=|<=|&&|\|\||[-+*/%!<>(),{};])"
+)
+
+# the tokens of a fixed lexeme are made once and shared
+FIXED_TOKENS = {
+    **{value: Token(PUNCTUATION, value) for value in PUNCTUATIONS},
+    **{value: Token(OPERATOR, value) for value in OPERATORS},
+    **{value: Token(LOGICOPERATOR, value) for value in LOGICOPERATORS},
+    **{value: Token(COMPARATOR, value) for value in COMPARATORS},
+    **{value: Token(KEYWORD, value) for value in KEYWORDS},
+    "True": Token(BOOLEAN, True),
+    "False": Token(BOOLEAN, False),
+    "or": Token(ORFUNC, "or"),
+}
+
+
+def make_token(kind, lexeme):
+    if kind == "INTEGER":
+        return Token(INTEGER, int(lexeme))
+    token = FIXED_TOKENS.get(lexeme)
+    if token is None:
+        return Token(IDENTIFIER, lexeme)
+    return token
+
+
+# generator of the tokens of a text, without the ordering of plain expressions
+def tokenize(text):
+    match = TOKEN_PATTERN.match
+    pos = 0
+    end = len(text)
+    while pos < end:
+        found = match(text, pos)
+        if found is None:
+            raise Exception("Invalid character")
+        pos = found.end()
+        kind = found.lastgroup
+        if kind != "SPACE":
+            yield make_token(kind, found.group())
 
 
 def recurse(node):
@@ -200,13 +309,24 @@ def OrderParanthText(text):
 
 
 class Lexer:
-    def __init__(self, text):
+    # a plain expression (no Defun and no ;) is put in python precedence order
+    # with one extra pair of parenthesis around every operation. single_pass=True
+    # does that with order_tokens() while scanning the text once, single_pass=False
+    # keeps the older OrderParanthText() round-trip through python's ast module
+    def __init__(self, text, single_pass=True):
         try:
             self.text = text
+            self.tokens = None
 
             boolFlagOrderParanthText = False
 
             if "Defun" not in str(self.text) and ";" not in str(self.text):
+                if single_pass:
+                    self.pos = 0
+                    self.current_char = self.text[self.pos]
+                    self.tokens = iter(self.order_tokens())
+                    self.current_char = None
+                    return
                 for x in LOGICOPERATORS:
                     if x in str(self.text):
                         if x == "&&":
@@ -225,164 +345,213 @@ class Lexer:
     def error(self):
         raise Exception("Invalid character")
 
-    def getNextChar(self):
-        if self.pos + 1 < len(self.text):
-            return str(self.text[self.pos + 1])
-        else:
-            return None
-
-    def advance(self):
-        self.pos += 1
-        if self.pos < len(self.text):
-            self.current_char = self.text[self.pos]
-        else:
-            self.current_char = None
-
-    def skip_whitespace(self):
-        while self.current_char is not None and self.current_char.isspace():
-            self.advance()
-
-    def number(self):
-        result = ""
-
-        while self.current_char is not None and self.current_char.isdigit():
-            result += self.current_char
-            self.advance()
-
-        return int(result)
-
-    def identifier(self):
-        result = ""
-        while self.current_char is not None and (self.current_char.isalnum()):
-            result += self.current_char
-            self.advance()
-
-        if result in KEYWORDS:
-            return Token(KEYWORD, result)
-
-        elif result == "True":
-            return Token(BOOLEAN, True)
-
-        elif result == "False":
-            return Token(BOOLEAN, False)
+    def get_next_token(self):
+        # tokens that order_tokens() already put in order
+        if self.tokens is not None:
+            return next(self.tokens, None)
+
+        text = self.text
+        while self.pos < len(text):
+            found = TOKEN_PATTERN.match(text, self.pos)
+            if found is None:
+                self.error()
+            self.pos = found.end()
+            # the parser looks at the character right after the last token
+            if self.pos < len(text):
+                self.current_char = text[self.pos]
+            else:
+                self.current_char = None
 
-        elif result == "or":
-            return Token(ORFUNC, "or")
+            kind = found.lastgroup
+            if kind != "SPACE":
+                return make_token(kind, found.group())
 
-        else:
-            return Token(IDENTIFIER, result)
+        return None
 
-    def get_next_token(self):
-        while self.current_char is not None:
-            # skip whitespaces
-            if self.current_char.isspace():
-                self.skip_whitespace()
-                continue
+    # the single pass mode: a precedence climbing walk over the raw tokens that
+    # writes out the same token stream the lexer would get from the text made by
+    # OrderParanthText(). an operation that starts at out[i] only adds one to
+    # opens[i], and the "(" are put in front of their tokens once at the end.
+    # as in python: "or" < "and" < "not" < comparators < + - < * / % < unary - +
+    # python keeps a < b < c and a && b && c as one node of which
+    # OrderParanthText() only writes the first two operands, so the operands
+    # after those are read and dropped: 2 && 0 && 2 == 5 is (2 && 0)
+
+    def order_tokens(self):
+        self.out = []
+        self.opens = []
+        self.raw = self.get_next_token()
+
+        self.order_or()
+
+        # a tuple like "E(1), 3" only keeps its first element
+        while self.raw_is(PUNCTUATION, ","):
+            self.raw = self.get_next_token()
+            if self.raw is None:
+                break
+            self.drop(self.order_or)
+
+        # a call of a call like lambd (x) (2) is only fine in a dropped operand
+        if self.raw is not None or None in self.out:
+            self.error()
 
-            # if the char is a punctuation then return it as token and advance by one char
-            elif self.current_char in PUNCTUATIONS:
-                token = Token(PUNCTUATION, self.current_char)
-                self.advance()
-                return token
-
-            # identify int nums as token
-            if self.current_char.isdigit():
-                return Token(INTEGER, self.number())
-
-            # if the char is math operator then return it as token and advance by one char
-            elif self.current_char in OPERATORS and self.current_char != "!":
-                token = Token(OPERATOR, self.current_char)
-                self.advance()
-                return token
-
-            # if the char is logic operator then return it as token and advance by two char
-            elif self.current_char == "|":
-                if self.pos + 1 < len(self.text):
-                    if self.text[self.pos + 1] == "|":
-                        token = Token(LOGICOPERATOR, "||")
-                        self.advance()
-                        self.advance()
-                        return token
-                else:
-                    self.error()
+        tokens = []
+        for token, opens in zip(self.out, self.opens):
+            for _ in range(opens):
+                tokens.append(FIXED_TOKENS["("])
+            tokens.append(token)
+        return tokens
 
-            elif self.current_char == "&":
-                if self.pos + 1 < len(self.text):
-                    if self.text[self.pos + 1] == "&":
-                        token = Token(LOGICOPERATOR, "&&")
-                        self.advance()
-                        self.advance()
-                        return token
-                else:
-                    self.error()
+    def raw_is(self, type, value):
+        return (
+            self.raw is not None and self.raw.type == type and self.raw.value == value
+        )
 
-            # if the char is a comparator then return it as token and advance by two char
-            elif self.current_char == "=":
-                if self.pos + 1 < len(self.text):
-                    if self.text[self.pos + 1] == "=":
-                        token = Token(COMPARATOR, "==")
-                        self.advance()
-                        self.advance()
-                        return token
-                else:
+    def emit(self, token):
+        self.out.append(token)
+        self.opens.append(0)
+
+    def drop(self, order):
+        # reads an operand without writing it out
+        kept = len(self.out)
+        order()
+        del self.out[kept:]
+        del self.opens[kept:]
+
+    def emit_operation(self, start, token, order_right):
+        # turns the operand that starts at out[start] into (left token right)
+        self.raw = self.get_next_token()
+        self.opens[start] += 1
+        self.emit(token)
+        order_right()
+        self.emit(FIXED_TOKENS[")"])
+
+    def order_or(self):
+        start = len(self.out)
+        self.order_and()
+        if self.raw_is(LOGICOPERATOR, "||") or self.raw_is(ORFUNC, "or"):
+            self.emit_operation(start, FIXED_TOKENS["||"], self.order_and)
+        while self.raw_is(LOGICOPERATOR, "||") or self.raw_is(ORFUNC, "or"):
+            self.raw = self.get_next_token()
+            self.drop(self.order_and)
+
+    def order_and(self):
+        start = len(self.out)
+        self.order_not()
+        if self.raw_is(LOGICOPERATOR, "&&") or self.raw_is(IDENTIFIER, "and"):
+            self.emit_operation(start, FIXED_TOKENS["&&"], self.order_not)
+        while self.raw_is(LOGICOPERATOR, "&&") or self.raw_is(IDENTIFIER, "and"):
+            self.raw = self.get_next_token()
+            self.drop(self.order_not)
+
+    def order_not(self):
+        if not self.raw_is(IDENTIFIER, "not"):
+            self.order_comparison()
+            return
+        self.raw = self.get_next_token()
+        self.emit(FIXED_TOKENS["("])
+        self.emit(FIXED_TOKENS["!"])
+        self.emit(FIXED_TOKENS["("])
+        self.order_not()
+        self.emit(FIXED_TOKENS[")"])
+        self.emit(FIXED_TOKENS[")"])
+
+    def order_comparison(self):
+        start = len(self.out)
+        self.order_sum()
+        if self.raw is not None and self.raw.type == COMPARATOR:
+            self.emit_operation(start, self.raw, self.order_sum)
+        while self.raw is not None and self.raw.type == COMPARATOR:
+            self.raw = self.get_next_token()
+            self.drop(self.order_sum)
+
+    def order_sum(self):
+        start = len(self.out)
+        self.order_product()
+        while self.raw_is(OPERATOR, "+") or self.raw_is(OPERATOR, "-"):
+            self.emit_operation(start, self.raw, self.order_product)
+
+    def order_product(self):
+        start = len(self.out)
+        self.order_unary()
+        while (
+            self.raw_is(OPERATOR, "*")
+            or self.raw_is(OPERATOR, "/")
+            or self.raw_is(OPERATOR, "%")
+        ):
+            self.emit_operation(start, self.raw, self.order_unary)
+
+    def order_unary(self):
+        # -x is written as (0 - x) and +x as (0 + x)
+        if not (self.raw_is(OPERATOR, "-") or self.raw_is(OPERATOR, "+")):
+            self.order_atom()
+            return
+        start = len(self.out)
+        self.emit(Token(INTEGER, 0))
+        self.emit_operation(start, self.raw, self.order_unary)
+
+    def order_call(self, start):
+        # a call is written as (name(arg,arg))
+        if not self.raw_is(PUNCTUATION, "("):
+            return
+        self.opens[start] += 1
+        while self.raw_is(PUNCTUATION, "("):
+            if len(self.out) > start + 1:
+                # a call of the call, which OrderParanthText() cannot write
+                self.out.append(None)
+                self.opens.append(0)
+            self.emit(self.raw)
+            self.raw = self.get_next_token()
+            while not self.raw_is(PUNCTUATION, ")"):
+                self.order_or()
+                if self.raw_is(PUNCTUATION, ","):
+                    self.raw = self.get_next_token()
+                    if not self.raw_is(PUNCTUATION, ")"):
+                        self.emit(FIXED_TOKENS[","])
+                elif not self.raw_is(PUNCTUATION, ")"):
                     self.error()
+            self.raw = self.get_next_token()
+            self.emit(FIXED_TOKENS[")"])
+        self.emit(FIXED_TOKENS[")"])
 
-            elif self.current_char == "!":
-                if self.pos + 1 < len(self.text):
-                    if self.text[self.pos + 1] == "=":
-                        token = Token(COMPARATOR, "!=")
-                        self.advance()
-                        self.advance()
-                        return token
-                    else:
-                        token = Token(OPERATOR, "!")
-                        self.advance()
-                        return token
-                else:
-                    token = Token(OPERATOR, "!")
-                    self.advance()
-                    return token
-
-            elif self.current_char == ">":
-                if self.pos + 1 < len(self.text):
-                    if self.text[self.pos + 1] == "=":
-                        token = Token(COMPARATOR, ">=")
-                        self.advance()
-                        self.advance()
-                        return token
-                    else:
-                        token = Token(COMPARATOR, ">")
-                        self.advance()
-                        return token
-                else:
-                    token = Token(COMPARATOR, ">")
-                    self.advance()
-                    return token
-
-            elif self.current_char == "<":
-                if self.pos + 1 < len(self.text):
-                    if self.text[self.pos + 1] == "=":
-                        token = Token(COMPARATOR, "<=")
-                        self.advance()
-                        self.advance()
-                        return token
-                    else:
-                        token = Token(COMPARATOR, "<")
-                        self.advance()
-                        return token
-                else:
-                    token = Token(COMPARATOR, "<")
-                    self.advance()
-                    return token
+    def order_atom(self):
+        token = self.raw
+        if token is None:
+            self.error()
 
-            # if the current char is alpha-type then identify the word by activation of identifier()
-            elif self.current_char.isalpha():
-                return self.identifier()
+        if token.type == INTEGER or token.type == BOOLEAN:
+            self.emit(token)
+            self.raw = self.get_next_token()
 
-            else:
+        elif token.type == PUNCTUATION and token.value == "(":
+            # the parenthesis of the text itself are not needed anymore
+            start = len(self.out)
+            self.raw = self.get_next_token()
+            self.order_or()
+            if not self.raw_is(PUNCTUATION, ")"):
                 self.error()
+            self.raw = self.get_next_token()
+            # python calls (F)(2) as F(2), but (2)(3) is not a call of a name
+            if self.raw_is(PUNCTUATION, "("):
+                if not (
+                    len(self.out) == start + 1
+                    and self.out[start].type in (IDENTIFIER, KEYWORD)
+                ):
+                    self.out.append(None)
+                    self.opens.append(0)
+                self.order_call(start)
 
-        return None
+        elif (token.type == IDENTIFIER or token.type == KEYWORD) and token.value not in (
+            "and",
+            "not",
+        ):
+            start = len(self.out)
+            self.emit(token)
+            self.raw = self.get_next_token()
+            self.order_call(start)
+
+        else:
+            self.error()
 
 
 # PPPPPPPPPPPPPPPPP        AAA               RRRRRRRRRRRRRRRRR      SSSSSSSSSSSSSSS EEEEEEEEEEEEEEEEEEEEEERRRRRRRRRRRRRRRRR
@@ -403,8 +572,38 @@ class Lexer:
 # PPPPPPPPPPAAAAAAA                   AAAAAAARRRRRRRR     RRRRRRR SSSSSSSSSSSSSSS   EEEEEEEEEEEEEEEEEEEEEERRRRRRRR     RRRRRRR
 
 
-# node types for the AST
+# node types for the AST. there can be millions of nodes in a large program,
+# so they keep their fields in __slots__ instead of a __dict__
+
+# the operator of a BinOp or a UnaryOp is one of these small ints, the text it
+# was written as is OPERATOR_SYMBOLS[op]
+(
+    OP_ADD,
+    OP_SUB,
+    OP_MUL,
+    OP_DIV,
+    OP_MOD,
+    OP_AND,
+    OP_OR,
+    OP_EQ,
+    OP_NE,
+    OP_GT,
+    OP_LT,
+    OP_GE,
+    OP_LE,
+    OP_NOT,
+) = range(14)
+
+OPERATOR_SYMBOLS = ("+", "-", "*", "/", "%", "&&", "||", "==", "!=", ">", "<", ">=", "<=", "!")
+
+OPCODES = {symbol: op for op, symbol in enumerate(OPERATOR_SYMBOLS)}
+
+ARITHMETIC_OPS = frozenset((OP_ADD, OP_SUB, OP_MUL, OP_DIV, OP_MOD))
+
+
 class Num:
+    __slots__ = ("value",)
+
     def __init__(self, value):
         self.value = value
 
@@ -413,6 +612,8 @@ class Num:
 
 
 class Bool:
+    __slots__ = ("value",)
+
     def __init__(self, value):
         self.value = value
 
@@ -420,7 +621,20 @@ class Bool:
         return f"Bool({self.value})"
 
 
+class Var:
+    # a name read from the local env
+    __slots__ = ("name",)
+
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return f"Var({self.name})"
+
+
 class CompOp:
+    __slots__ = ("left", "op", "right")
+
     def __init__(self, left, op, right):
         self.left = left
         self.op = op
@@ -431,6 +645,8 @@ class CompOp:
 
 
 class advancedFuncOp:
+    __slots__ = ("left", "op", "right")
+
     def __init__(self, left, op, right):
         self.left = left
         self.op = op
@@ -441,6 +657,8 @@ class advancedFuncOp:
 
 
 class FuncOp:
+    __slots__ = ("left", "op", "right")
+
     def __init__(self, left, op, right):
         self.left = left
         self.op = op
@@ -451,31 +669,31 @@ class FuncOp:
 
 
 class BinOp:
+    __slots__ = ("left", "op", "right")
+
     def __init__(self, left, op, right):
         self.left = left
         self.op = op
         self.right = right
 
     def __repr__(self):
-        return f"BinOp({self.left}, {self.op}, {self.right})"
-
-    def ifLeftIsNum(self):
-        return not isnan(self.left)
-
-    def ifRightIsNum(self):
-        return not isnan(self.right)
+        return f"BinOp({self.left}, {OPERATOR_SYMBOLS[self.op]}, {self.right})"
 
 
 class UnaryOp:
+    __slots__ = ("op", "expr")
+
     def __init__(self, op, expr):
         self.op = op
         self.expr = expr
 
     def __repr__(self):
-        return f"UnaryOp({self.op}, {self.expr})"
+        return f"UnaryOp({OPERATOR_SYMBOLS[self.op]}, {self.expr})"
 
 
 class FuncDef:
+    __slots__ = ("name", "params", "body")
+
     def __init__(self, name, params, body):
         self.name = name
         self.params = params
@@ -486,6 +704,8 @@ class FuncDef:
 
 
 class LambdaExpr:
+    __slots__ = ("params", "body")
+
     def __init__(self, params, body):
         self.params = params
         self.body = body
@@ -495,6 +715,8 @@ class LambdaExpr:
 
 
 class FuncCall:
+    __slots__ = ("name", "args")
+
     def __init__(self, name, args):
         self.name = name
         self.args = args
@@ -503,6 +725,301 @@ class FuncCall:
         return f"FuncCall({self.name}, {self.args})"
 
 
+class TailCall:
+    # a pending call returned by a body compiled with tail=True
+    __slots__ = ("code", "local_env", "discard")
+
+    def __init__(self, code, local_env, discard):
+        self.code = code
+        self.local_env = local_env
+        self.discard = discard
+
+
+class Thunk:
+    # an argument of a lazy call, evaluated by code in the env of the caller
+    # the first time the body reads it and kept from then on
+    __slots__ = ("code", "local_env", "value")
+
+    def __init__(self, code, local_env):
+        self.code = code
+        self.local_env = local_env
+        self.value = None
+
+    def force(self):
+        if self.code is not None:
+            self.value = self.code(self.local_env)
+            # the env of the caller is not needed any more
+            self.code = self.local_env = None
+        return self.value
+
+
+class MemoTable:
+    # the results of one memoized function by argument values, the least
+    # recently used first
+    __slots__ = ("name", "max_size", "entries", "hits", "misses")
+
+    def __init__(self, name, max_size):
+        self.name = name
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+
+class BudgetExceeded(RuntimeError):
+    # raised when a program goes past a limit of Interpreter.set_limits(), with
+    # how far it got: the steps it made, the call depth it was at and the
+    # deepest one it reached, and the seconds it ran. unlike other runtime
+    # errors it is not printed by interpret(), it ends the whole program
+    def __init__(self, limit, steps, depth, deepest, elapsed):
+        super().__init__(f"{limit} limit exceeded")
+        self.limit = limit
+        self.steps = steps
+        self.depth = depth
+        self.deepest = deepest
+        self.elapsed = elapsed
+
+    def stats(self):
+        return {
+            "limit": self.limit,
+            "steps": self.steps,
+            "depth": self.depth,
+            "deepest": self.deepest,
+            "elapsed": self.elapsed,
+        }
+
+
+def memo_key(local_env):
+    # True == 1 for a dict, but the two give different results (eg: True + 1
+    # is a type error), so any bool in the arguments puts the types in the key
+    values = tuple(local_env)
+    for value in values:
+        if value.__class__ is bool:
+            return tuple((value.__class__, value) for value in values)
+    return values
+
+
+def force_arguments(local_env):
+    # the values of all the arguments of a lazy call, eg: for its memo key
+    for i, value in enumerate(local_env):
+        if value.__class__ is Thunk:
+            local_env[i] = value.force()
+    return local_env
+
+
+def resolve_slots(params):
+    # gives every parameter name the index of its slot in the list frame of a
+    # call, in the order a dict {params[i]: ...} would keep the names. slots
+    # is None when the names are unique and argument i simply goes to slot i,
+    # otherwise it holds the slot of every argument (the last one wins)
+    layout = {}
+    for param in params:
+        layout.setdefault(param, len(layout))
+    if len(layout) == len(params):
+        return layout, None
+    return layout, tuple(layout[param] for param in params)
+
+
+def load_numpy():
+    global numpy
+    if numpy is None:
+        try:
+            import numpy
+        except ImportError:
+            return None
+    return numpy
+
+
+def infer_type(node, types):
+    # the class (int or bool) the value of an operand is proven to have, or
+    # None. types holds the proven class of the parameters. an operator that
+    # gives a value at all gives a known class: a bool or None operand of + - *
+    # / % raises, and && || ! and the comparisons only give bools. a call can
+    # give None when its body printed a type error, so it proves nothing
+    if isinstance(node, Num):
+        return int if node.value.__class__ is int else None
+    if isinstance(node, Bool):
+        return bool
+    if isinstance(node, Var):
+        return types.get(node.name)
+    if isinstance(node, LambdaExpr):
+        return infer_type(node.body, types)
+    if isinstance(node, BinOp):
+        return int if node.op in ARITHMETIC_OPS else bool
+    if isinstance(node, UnaryOp):
+        return bool
+    return None
+
+
+def parameter_types(body, params):
+    # the class every parameter is used as by the operators of body: int for
+    # an operand of + - * / %, bool for one of && ||, None for a parameter
+    # used as neither or as both. a Defun called with arguments of these
+    # classes runs a body compiled knowing them
+    uses = {}
+    nodes = [body]
+    while nodes:
+        node = nodes.pop()
+        if isinstance(node, (advancedFuncOp, FuncOp)):
+            nodes.extend((node.left, node.right))
+        elif isinstance(node, BinOp):
+            if node.op in ARITHMETIC_OPS:
+                used_as = int
+            elif node.op in (OP_AND, OP_OR):
+                used_as = bool
+            else:
+                used_as = None
+            for operand in (node.left, node.right):
+                if used_as is not None and isinstance(operand, Var):
+                    uses.setdefault(operand.name, set()).add(used_as)
+                nodes.append(operand)
+        elif isinstance(node, LambdaExpr):
+            nodes.append(node.body)
+        elif isinstance(node, FuncCall) and isinstance(node.args, list):
+            nodes.extend(node.args)
+        # the operand of a UnaryOp is evaluated without the parameters
+    return tuple(
+        next(iter(uses[param])) if len(uses.get(param, ())) == 1 else None
+        for param in params
+    )
+
+
+def is_integer_arithmetic(body, params):
+    # True if body is a BinOp made only of + - * / %, int literals and the
+    # params, so with int arguments it can only give an int or divide by zero
+    if not isinstance(body, BinOp):
+        return False
+    nodes = [body]
+    while nodes:
+        node = nodes.pop()
+        if isinstance(node, LambdaExpr):
+            nodes.append(node.body)
+        elif isinstance(node, BinOp) and node.op in ARITHMETIC_OPS:
+            nodes.extend((node.left, node.right))
+        elif isinstance(node, Num):
+            if node.value.__class__ is not int:
+                return False
+        elif not (isinstance(node, Var) and node.name in params):
+            return False
+    return True
+
+
+def reaches_print(body, global_env, name=None):
+    # True if evaluating body can reach the print of a FuncOp sequence, also
+    # through the bodies of the functions it calls
+    seen = {name}
+    nodes = [body]
+    while nodes:
+        node = nodes.pop()
+        if isinstance(node, list):
+            nodes.extend(node)
+        elif isinstance(node, advancedFuncOp):
+            if isinstance(node.right, FuncOp):
+                return True
+            nodes.extend((node.left, node.right))
+        elif isinstance(node, (BinOp, FuncOp)):
+            nodes.extend((node.left, node.right))
+        elif isinstance(node, UnaryOp):
+            nodes.append(node.expr)
+        elif isinstance(node, LambdaExpr):
+            nodes.append(node.body)
+        elif isinstance(node, FuncCall):
+            if isinstance(node.args, list):
+                nodes.extend(node.args)
+            if node.name not in seen and node.name in global_env:
+                seen.add(node.name)
+                nodes.append(global_env[node.name][1])
+    return False
+
+
+# every binary operator takes a single factor as its right operand, so the
+# trees are always left deep and all that tells the operators apart is which
+# class of them may still follow the ones already read. an expression goes
+# through EXPRESSION_PHASES in order, reading each class any number of times.
+ARITHMETIC, COMPARISON, LOGIC, BASECASE, SEQUENCE = range(5)
+
+BINARY_OPERATORS = {
+    **{(OPERATOR, op): ARITHMETIC for op in ("*", "/", "%", "-", "+")},
+    **{(COMPARATOR, op): COMPARISON for op in COMPARATORS},
+    **{(LOGICOPERATOR, op): LOGIC for op in LOGICOPERATORS},
+    (ORFUNC, "or"): BASECASE,
+    (PUNCTUATION, ","): SEQUENCE,  # only after a function call
+}
+
+OPERATOR_NODES = {
+    ARITHMETIC: BinOp,
+    COMPARISON: BinOp,
+    LOGIC: BinOp,
+    BASECASE: advancedFuncOp,
+    SEQUENCE: FuncOp,
+}
+
+EXPRESSION_PHASES = (
+    ARITHMETIC,
+    COMPARISON,
+    LOGIC,
+    BASECASE,
+    ARITHMETIC,
+    COMPARISON,
+    LOGIC,
+    BASECASE,
+    SEQUENCE,
+)
+
+# NEXT_PHASE[phase][op_class] is the first phase from phase on that reads
+# op_class, or None when the expression ends before such an operator
+NEXT_PHASE = [
+    [
+        next(
+            (
+                later
+                for later in range(phase, len(EXPRESSION_PHASES))
+                if EXPRESSION_PHASES[later] == op_class
+            ),
+            None,
+        )
+        for op_class in range(5)
+    ]
+    for phase in range(len(EXPRESSION_PHASES))
+]
+
+# what an expression on the parser stack is nested in
+EXPRESSION, PARENTHESIS, ARGUMENT, LAMBDA_BODY = range(4)
+
+
+class ParseFrame:
+    __slots__ = (
+        "kind",
+        "func_name",
+        "left",
+        "phase",
+        "op",
+        "op_class",
+        "unary",
+        "name",
+        "args",
+        "params",
+    )
+
+    def __init__(self, kind, func_name):
+        self.kind = kind
+        self.func_name = func_name
+        self.left = None
+        self.phase = 0
+        self.op = None
+        self.op_class = None
+        self.unary = 0
+        self.name = None
+        self.args = None
+        self.params = None
+
+
 class Parser:
     def __init__(self, lexer, interpreter):
         self.lexer = lexer
@@ -518,210 +1035,133 @@ class Parser:
         else:
             self.error()
 
-    def factor(self, func_name):
-        token = self.current_token
-
-        if token.type == KEYWORD and token.value == "lambd":
-            return self.lambda_expr()
+    def expr(self, func_name):
+        # an expression nested in parenthesis, in the arguments of a call or in
+        # the body of a lambd is kept as a ParseFrame on this stack instead of a
+        # recursive call, so the nesting depth costs no python frames
+        stack = []
+        frame = ParseFrame(EXPRESSION, func_name)
 
-        if token.type == INTEGER:
-            self.eat(INTEGER)
-            return Num(token.value)
-
-        elif token.type == BOOLEAN:
-            self.eat(BOOLEAN)
-            return Bool(token.value)
-
-        elif token.value in self.interpreterCopy.global_env.keys():
-            func_name = token.value
-            self.eat(IDENTIFIER)  # func name
-            self.eat(PUNCTUATION)  # (
-            args = []
-            args.append(self.expr(""))
-            while (
-                self.current_token is not None
-                and self.current_token.type == PUNCTUATION
-                and self.current_token.value == ","
-            ):
-                self.eat(PUNCTUATION)  # ,
-                args.append(self.expr(""))
+        while True:
+            # read the factor of the current operand
+            token = self.current_token
+
+            if token.type == KEYWORD and token.value == "lambd":
+                self.eat(KEYWORD)  # lambd
+                self.eat(PUNCTUATION)  # (
+                parameters = self.params()
+                self.eat(PUNCTUATION)  # )
+                self.eat(PUNCTUATION)  # (
+                stack.append(frame)
+                frame = ParseFrame(LAMBDA_BODY, "")
+                frame.params = parameters
+                continue
 
-            self.eat(PUNCTUATION)  # )
-            return FuncCall(func_name, args)
+            if token.type == INTEGER:
+                self.eat(INTEGER)
+                operand = Num(token.value)
 
-        elif token.type == IDENTIFIER and token.value != func_name:
-            self.eat(IDENTIFIER)
-            return token.value
+            elif token.type == BOOLEAN:
+                self.eat(BOOLEAN)
+                operand = Bool(token.value)
 
-        elif token.type == IDENTIFIER:
-            func_name = token.value
-            self.eat(IDENTIFIER)  # func name
-            self.eat(PUNCTUATION)  # (
-            args = []
-            args.append(self.expr(""))
-            while (
-                self.current_token is not None
-                and self.current_token.type == PUNCTUATION
-                and self.current_token.value == ","
+            elif token.value in self.interpreterCopy.global_env.keys() or (
+                token.type == IDENTIFIER and token.value == frame.func_name
             ):
-                self.eat(PUNCTUATION)  # ,
-                args.append(self.expr(""))
-            self.eat(PUNCTUATION)  # )
-            return FuncCall(func_name, args)
-
-        elif (
-            token.type == PUNCTUATION
-            and token.value == "("
-            and self.lexer.current_char == "-"
-        ):
-            self.eat(PUNCTUATION)
-            self.eat(OPERATOR)
-            num = self.current_token.value
-            self.eat(INTEGER)
-            self.eat(PUNCTUATION)
-            return Num(-1 * num)
-
-        elif token.type == PUNCTUATION and token.value == "(":
-            self.eat(PUNCTUATION)
-            expr = self.expr(func_name)
-            self.eat(PUNCTUATION)
-            return expr
-
-        elif token.type == OPERATOR and token.value == "!":
-            self.eat(OPERATOR)
-            expr = self.factor(func_name)
-            return UnaryOp("!", expr)
-
-        else:
-            self.error()
-
-    def term(self, func_name):
-        left = self.factor(func_name)
-
-        while (
-            self.current_token is not None
-            and self.current_token.type == OPERATOR
-            and (
-                self.current_token.value == "*"
-                or self.current_token.value == "/"
-                or self.current_token.value == "%"
-                or self.current_token.value == "-"
-                or self.current_token.value == "+"
-            )
-        ):
-            op = self.current_token.value
-            self.eat(OPERATOR)
-            right = self.factor(func_name)
-            left = BinOp(left, op, right)
-
-        while (
-            self.current_token is not None
-            and self.current_token.type == COMPARATOR
-            and (
-                self.current_token.value == "=="
-                or self.current_token.value == "!="
-                or self.current_token.value == ">"
-                or self.current_token.value == "<"
-                or self.current_token.value == ">="
-                or self.current_token.value == "<="
-            )
-        ):
-            op = self.current_token.value
-            self.eat(COMPARATOR)
-            right = self.factor(func_name)
-            left = BinOp(left, op, right)
-
-        while (
-            self.current_token is not None
-            and self.current_token.type == LOGICOPERATOR
-            and (self.current_token.value == "&&" or self.current_token.value == "||")
-        ):
-            op = self.current_token.value
-            self.eat(LOGICOPERATOR)
-            right = self.factor(func_name)
-            left = BinOp(left, op, right)
-
-        while (
-            self.current_token is not None
-            and self.current_token.type == ORFUNC
-            and self.current_token.value == "or"
-        ):
-            op = self.current_token.value
-            self.eat(ORFUNC)
-            right = self.factor(func_name)
-            left = advancedFuncOp(left, op, right)
+                self.eat(IDENTIFIER)  # func name
+                self.eat(PUNCTUATION)  # (
+                stack.append(frame)
+                frame = ParseFrame(ARGUMENT, "")
+                frame.name = token.value
+                frame.args = []
+                continue
 
-        return left
+            elif token.type == IDENTIFIER:
+                self.eat(IDENTIFIER)
+                operand = Var(token.value)
 
-    def expr(self, func_name):
-        left = self.term(func_name)
+            elif (
+                token.type == PUNCTUATION
+                and token.value == "("
+                and self.lexer.current_char == "-"
+            ):
+                self.eat(PUNCTUATION)
+                self.eat(OPERATOR)
+                num = self.current_token.value
+                self.eat(INTEGER)
+                self.eat(PUNCTUATION)
+                operand = Num(-1 * num)
 
-        while (
-            self.current_token is not None
-            and self.current_token.type == OPERATOR
-            and (
-                self.current_token.value == "*"
-                or self.current_token.value == "/"
-                or self.current_token.value == "%"
-                or self.current_token.value == "-"
-                or self.current_token.value == "+"
-            )
-        ):
-            op = self.current_token.value
-            self.eat(OPERATOR)
-            right = self.factor(func_name)
-            left = BinOp(left, op, right)
+            elif token.type == PUNCTUATION and token.value == "(":
+                self.eat(PUNCTUATION)
+                stack.append(frame)
+                frame = ParseFrame(PARENTHESIS, frame.func_name)
+                continue
 
-        while (
-            self.current_token is not None
-            and self.current_token.type == COMPARATOR
-            and (
-                self.current_token.value == "=="
-                or self.current_token.value == "!="
-                or self.current_token.value == ">"
-                or self.current_token.value == "<"
-                or self.current_token.value == ">="
-                or self.current_token.value == "<="
-            )
-        ):
-            op = self.current_token.value
-            self.eat(COMPARATOR)
-            right = self.factor(func_name)
-            left = BinOp(left, op, right)
+            elif token.type == OPERATOR and token.value == "!":
+                self.eat(OPERATOR)
+                frame.unary += 1
+                continue
 
-        while (
-            self.current_token is not None
-            and self.current_token.type == LOGICOPERATOR
-            and (self.current_token.value == "&&" or self.current_token.value == "||")
-        ):
-            op = self.current_token.value
-            self.eat(LOGICOPERATOR)
-            right = self.factor(func_name)
-            left = BinOp(left, op, right)
+            else:
+                self.error()
 
-        while (
-            self.current_token is not None
-            and self.current_token.type == ORFUNC
-            and self.current_token.value == "or"
-        ):
-            op = self.current_token.value
-            self.eat(ORFUNC)
-            right = self.factor(func_name)
+            while True:
+                while frame.unary:
+                    frame.unary -= 1
+                    operand = UnaryOp(OP_NOT, operand)
 
-            left = advancedFuncOp(left, op, right)
+                if frame.op is None:
+                    frame.left = operand
+                else:
+                    frame.left = OPERATOR_NODES[frame.op_class](frame.left, frame.op, operand)
+                    frame.op = None
+
+                # one loop reads every operator of the expression, the table
+                # says whether the next one may still follow the ones before
+                token = self.current_token
+                if token is not None:
+                    op_class = BINARY_OPERATORS.get((token.type, token.value))
+                    if op_class is not None and (
+                        op_class != SEQUENCE or isinstance(frame.left, FuncCall)
+                    ):
+                        phase = NEXT_PHASE[frame.phase][op_class]
+                        if phase is not None:
+                            frame.phase = phase
+                            # "or" and "," stay text, their node class is
+                            # all that tells them apart
+                            frame.op = OPCODES.get(token.value, token.value)
+                            frame.op_class = op_class
+                            self.eat(token.type)
+                            break
+
+                # the expression is complete
+                if frame.kind == EXPRESSION:
+                    return frame.left
+
+                if frame.kind == PARENTHESIS:
+                    self.eat(PUNCTUATION)
+                    operand = frame.left
 
-        while (
-            isinstance(left, FuncCall)
-            and self.current_token is not None
-            and self.current_token.type == PUNCTUATION
-            and self.current_token.value == ","
-        ):
-            op = self.current_token.value
-            self.eat(PUNCTUATION)
-            right = self.factor(func_name)
-            left = FuncOp(left, op, right)
+                elif frame.kind == LAMBDA_BODY:
+                    self.eat(PUNCTUATION)  # )
+                    operand = LambdaExpr(frame.params, frame.left)
 
-        return left
+                else:
+                    frame.args.append(frame.left)
+                    if (
+                        self.current_token is not None
+                        and self.current_token.type == PUNCTUATION
+                        and self.current_token.value == ","
+                    ):
+                        self.eat(PUNCTUATION)  # ,
+                        frame.left = None
+                        frame.phase = 0
+                        break
+                    self.eat(PUNCTUATION)  # )
+                    operand = FuncCall(frame.name, frame.args)
+
+                frame = stack.pop()
 
     def params(self):
         param_list = []
@@ -763,33 +1203,49 @@ class Parser:
         return LambdaExpr(parameters, body)
 
     def function_call(self):
+        # the calls whose arguments are still being read, innermost last
+        calls = []
         func_name = self.current_token.value
         self.eat(IDENTIFIER)  # funcName
         self.eat(PUNCTUATION)  # (
-
         args = []
-        if self.current_token.type != PUNCTUATION or self.current_token.value != ")":
-            if (
-                self.current_token.type == IDENTIFIER
-            ):  # case if we have a func within left parameter
-                args.append(self.function_call())
-            else:
+        # whether an argument comes next (a call can also have none at all)
+        argument = self.current_token.type != PUNCTUATION or self.current_token.value != ")"
+
+        while True:
+            if argument:
+                if (
+                    self.current_token.type == IDENTIFIER
+                ):  # case if we have a func within the parameters
+                    calls.append((func_name, args))
+                    func_name = self.current_token.value
+                    self.eat(IDENTIFIER)  # funcName
+                    self.eat(PUNCTUATION)  # (
+                    args = []
+                    argument = (
+                        self.current_token.type != PUNCTUATION
+                        or self.current_token.value != ")"
+                    )
+                    continue
                 args.append(self.expr(""))
-            while (
-                self.current_token is not None
+
+            if (
+                args
+                and self.current_token is not None
                 and self.current_token.type == PUNCTUATION
                 and self.current_token.value == ","
             ):
                 self.eat(PUNCTUATION)  # ,
+                argument = True
+                continue
 
-                if (
-                    self.current_token.type == IDENTIFIER
-                ):  # case if we have a func within the right parameters
-                    args.append(self.function_call())
-                else:
-                    args.append(self.expr(""))
-        self.eat(PUNCTUATION)  # )
-        return FuncCall(func_name, args)
+            self.eat(PUNCTUATION)  # )
+            call = FuncCall(func_name, args)
+            if not calls:
+                return call
+            func_name, args = calls.pop()
+            args.append(call)
+            argument = False
 
     def statement(self):
         token = self.current_token
@@ -838,8 +1294,78 @@ class Parser:
 
 
 class Interpreter:
-    def __init__(self):
+    # compiled=True runs the closures built by compile(); compiled=False keeps
+    # the original tree walker as a reference mode to check the closures against.
+    # memoize=True memoizes every Defun that cannot print, or it is a collection
+    # with the names of the functions to memoize (compiled mode only)
+    # profiler=Profiler() instruments the compiled code of the functions and
+    # operators defined from then on, without it nothing is measured at all.
+    # codegen=True translates the Defuns it can into python functions, see
+    # CodeGenerator (compiled mode only, not for memoized or profiled ones)
+    # short_circuit=True evaluates the right operand of && and || only when the
+    # left one does not decide the result, so a non-bool right operand is not
+    # an error there. the default keeps the strict rule: both operands are
+    # evaluated and both have to be bools
+    # lazy=True passes the arguments of a call as Thunks that are evaluated
+    # when the body first reads the parameter, if ever (no codegen then)
+    # inline=N compiles the body of a non-recursive Defun of at most N nodes
+    # into the closures of its calls, inline=0 never does (compiled mode only)
+    def __init__(
+        self,
+        compiled=True,
+        memoize=False,
+        memo_size=MEMO_SIZE,
+        profiler=None,
+        codegen=False,
+        short_circuit=False,
+        lazy=False,
+        inline=INLINE_NODES,
+    ):
         self.global_env = {}
+        self.compiled = compiled
+        self.codegen = codegen
+        self.short_circuit = short_circuit
+        self.lazy = lazy
+        self.inline = inline
+        # name -> ([valid], body compiled to be inlined or None, nodes of it
+        # with what it inlined itself, functions it reaches), see
+        # _inline_body(). valid is shared by the inlined copies and made False
+        # when the function or one it reaches is defined again. defining is
+        # the name of the Defun being compiled, which is never inlined
+        self.inlined = {}
+        self.defining = None
+        # nodes the inlined call being compiled can still take in, None when
+        # no inlined body is being compiled
+        self.inline_left = None
+        # (name, number of parameters) -> python function of the Defuns that
+        # were generated, what the generated calls look up
+        self.native = {}
+        self.max_tail_calls = MAX_TAIL_CALLS
+        self.memoize = memoize if memoize is True else set(memoize or ())
+        self.memo_size = memo_size
+        self.profiler = profiler
+        # parameter name -> frame slot of the body being compiled, names that
+        # are not in it read as None like a missing key of a local env dict
+        self.scope = {}
+        # parameter name -> class its value is proven to have in the body
+        # being compiled, and how many operand type checks that left out
+        self.types = {}
+        self.checks_eliminated = 0
+        # compiled body -> (parameter checks, body compiled knowing the
+        # classes of the parameters), see parameter_types()
+        self.specialized = {}
+        # compiled body -> MemoTable of the functions that are memoized
+        self.memo_tables = {}
+        # name -> names of the functions its body calls, see dependents()
+        self.called = {}
+        # name -> (body, nodes of it or 0 when numpy cannot evaluate it), what
+        # call_many(vectorize=True) compares a batch with, a redefined body is
+        # not the one stored and is looked at again
+        self.vector_nodes = {}
+        # how many times compiled code printed, a call that printed anything
+        # is never stored in a memo table
+        self.prints = 0
+        self.set_limits()
 
     def visit_Num(self, node):
         return node.value
@@ -851,29 +1377,41 @@ class Interpreter:
         left_val = 0
         right_val = 0
 
+        if self.short_circuit and (node.op == OP_AND or node.op == OP_OR):
+            left_val = self.visit(node.left, local_env)
+            if not isinstance(left_val, bool):
+                raise TypeError("one of the Operands is not bool")
+            # False && ... and True || ... are decided by the left operand
+            if left_val == (node.op == OP_OR):
+                return left_val
+            right_val = self.visit(node.right, local_env)
+            if not isinstance(right_val, bool):
+                raise TypeError("one of the Operands is not bool")
+            return right_val
+
         left_val = self.visit(node.left, local_env)
         right_val = self.visit(node.right, local_env)
 
         if (
-            node.op == "+"
+            node.op == OP_ADD
             and not isinstance(left_val, bool)
             and not isinstance(right_val, bool)
         ):
             return left_val + right_val
         elif (
-            node.op == "-"
+            node.op == OP_SUB
             and not isinstance(left_val, bool)
             and not isinstance(right_val, bool)
         ):
             return left_val - right_val
         elif (
-            node.op == "*"
+            node.op == OP_MUL
             and not isinstance(left_val, bool)
             and not isinstance(right_val, bool)
         ):
             return left_val * right_val
         elif (
-            node.op == "/"
+            node.op == OP_DIV
             and not isinstance(left_val, bool)
             and not isinstance(right_val, bool)
         ):
@@ -881,34 +1419,34 @@ class Interpreter:
                 raise RuntimeError("Division by zero")
             return left_val // right_val
         elif (
-            node.op == "%"
+            node.op == OP_MOD
             and not isinstance(left_val, bool)
             and not isinstance(right_val, bool)
         ):
             if right_val == 0:
                 raise RuntimeError("Modulo by zero")
             return left_val % right_val
-        elif node.op == "&&":
+        elif node.op == OP_AND:
             if isinstance(left_val, bool) and isinstance(right_val, bool):
                 return left_val and right_val
             else:
                 raise TypeError("one of the Operands is not bool")
-        elif node.op == "||":
+        elif node.op == OP_OR:
             if isinstance(left_val, bool) and isinstance(right_val, bool):
                 return left_val or right_val
             else:
                 raise TypeError("one of the Operands is not bool")
-        elif node.op == "==":
+        elif node.op == OP_EQ:
             return left_val == right_val
-        elif node.op == "!=":
+        elif node.op == OP_NE:
             return left_val != right_val
-        elif node.op == ">":
+        elif node.op == OP_GT:
             return left_val > right_val
-        elif node.op == "<":
+        elif node.op == OP_LT:
             return left_val < right_val
-        elif node.op == ">=":
+        elif node.op == OP_GE:
             return left_val >= right_val
-        elif node.op == "<=":
+        elif node.op == OP_LE:
             return left_val <= right_val
         else:
             raise TypeError("Type error")
@@ -916,21 +1454,163 @@ class Interpreter:
     def visit_UnaryOp(self, node):
         expr_val = self.visit(node.expr, "")
 
-        if node.op == "!" and isinstance(expr_val, bool):
+        if node.op == OP_NOT and isinstance(expr_val, bool):
             return not expr_val
         else:
             raise TypeError("Type error")
 
     def visit_FuncDef(self, node):
-        self.global_env[node.name] = (node.params, node.body)
+        # the body is compiled once here and kept next to (params, body),
+        # with its parameters read from the slots of a list frame
+        old = self.global_env.get(node.name)
+        if (
+            old is not None
+            and old[0] == node.params
+            and dump_program([old[1]]) == dump_program([node.body])
+        ):
+            # the same Defun again keeps its compiled code and memo table
+            return "defined successfully"
+
+        layout, slots = resolve_slots(node.params)
+        memoized = (
+            self.compiled
+            and (self.memoize is True or node.name in self.memoize)
+            and not reaches_print(node.body, self.global_env, node.name)
+        )
+        generated = None
+        specialized = None
+        scope, defining = self.scope, self.defining
+        self.scope, self.defining = layout, node.name
+        try:
+            code = self._compile_evaluate(node.body, tail=True)
+            if (
+                self.codegen
+                and self.compiled
+                and slots is None
+                and not memoized
+                and self.profiler is None
+                and not self.lazy
+            ):
+                generated = CodeGenerator(self, node, layout).generate()
+            if (
+                generated is None
+                and self.compiled
+                and slots is None
+                and not memoized
+                and self.profiler is None
+            ):
+                specialized = self._compile_specialized(node)
+        finally:
+            self.scope, self.defining = scope, defining
+
+        if node.name in self.global_env:
+            self.native.pop((node.name, len(self.global_env[node.name][0])), None)
+        if generated is not None:
+            function = generated[0]
+            self.native[(node.name, len(node.params))] = function
+            code = lambda local_env: function(*local_env)
+
+        if self.profiler is not None:
+            code = self.profiler.wrap_function(
+                node.name, code, not reaches_print(node.body, self.global_env, node.name)
+            )
+
+        if node.name in self.global_env:
+            self.specialized.pop(self.global_env[node.name][2], None)
+        if specialized is not None:
+            self.specialized[code] = specialized
+
+        if self.inlined:
+            # a function reaching this one can reach itself now
+            for name in self.dependents(node.name) | {node.name}:
+                if name in self.inlined:
+                    self.inlined.pop(name)[0][0] = False
+
+        if node.name in self.global_env and self.memo_tables:
+            # a redefinition can change the result of the functions calling it
+            self.memo_tables.pop(self.global_env[node.name][2], None)
+            stale = self.dependents(node.name)
+            for table in self.memo_tables.values():
+                if table.name in stale:
+                    table.entries.clear()
+        self.called[node.name] = called_names(node.body)
+
+        if memoized:
+            self.memo_tables[code] = MemoTable(node.name, self.memo_size)
+
+        self.global_env[node.name] = (node.params, node.body, code, slots)
         return "defined successfully"
 
+    def _compile_specialized(self, node):
+        # the body once more, with the parameters known to be of the classes
+        # the body uses them as. None if that leaves out no more checks
+        signature = parameter_types(node.body, node.params)
+        checks = tuple((i, kind) for i, kind in enumerate(signature) if kind is not None)
+        if not checks:
+            return None
+        before = self.checks_eliminated
+        self.types = {node.params[i]: kind for i, kind in checks}
+        try:
+            fast = self._compile_evaluate(node.body, tail=True)
+        finally:
+            self.types = {}
+        if self.checks_eliminated == before:
+            return None
+        return checks, fast
+
+    def _select_specialized(self, code, arg_types):
+        # (code to run, checks left or None) for a call of code with
+        # arguments of the proven classes arg_types
+        special = self.specialized.get(code)
+        if special is None:
+            return code, None
+        checks, fast = special
+        left = tuple((i, kind) for i, kind in checks if arg_types[i] is not kind)
+        return fast, left or None
+
+    def dependents(self, name):
+        # the defined functions that reach a call of name, directly or through
+        # the functions they call, so their results can change with it
+        found = set()
+        pending = [name]
+        while pending:
+            target = pending.pop()
+            for caller, callees in self.called.items():
+                if target in callees and caller not in found:
+                    found.add(caller)
+                    pending.append(caller)
+        return found
+
+    def reachable(self, name):
+        # the functions the body of name calls, directly or through the
+        # functions they call
+        found = set()
+        pending = [name]
+        while pending:
+            for callee in self.called.get(pending.pop(), ()):
+                if callee not in found:
+                    found.add(callee)
+                    pending.append(callee)
+        return found
+
+    def memo_stats(self):
+        return {
+            table.name: {
+                "hits": table.hits,
+                "misses": table.misses,
+                "size": len(table.entries),
+            }
+            for table in self.memo_tables.values()
+        }
+
     def visit_LambdaExpr(self, node, local_env):
         return self.visit(node.body, local_env)
 
     def visit_FuncCall(self, node, local_env2):
+        if self.limited:
+            self._step()
         if node.name in self.global_env:
-            params, body = self.global_env[node.name]
+            params, body = self.global_env[node.name][:2]
 
             if not isinstance(node.args, BinOp):
                 if len(node.args) != len(params) and not isinstance(
@@ -942,30 +1622,53 @@ class Interpreter:
 
                 if isinstance(node.args[0], FuncOp):
                     local_env = {
-                        params[0]: self.visit(node.args[0].left, local_env2),
-                        params[1]: self.visit(node.args[0].right, local_env2),
+                        params[0]: self._argument(node.args[0].left, local_env2),
+                        params[1]: self._argument(node.args[0].right, local_env2),
                     }
                 else:
                     local_env = {
-                        params[i]: self.visit(node.args[i], local_env2)
+                        params[i]: self._argument(node.args[i], local_env2)
                         for i in range(len(params))
                     }
 
             # continue from here in case of node.args is BinOp
             if isinstance(node.args, BinOp):
                 local_env = {
-                    params[i]: self.visit(node.args, local_env2)
+                    params[i]: self._argument(node.args, local_env2)
                     for i in range(len(params))
                 }
 
-            return self._evaluate(body, local_env)
+            if not self.limited:
+                return self._evaluate(body, local_env)
+            self._enter()
+            try:
+                return self._evaluate(body, local_env)
+            finally:
+                self.depth -= 1
         else:
             raise RuntimeError(f"Function {node.name} is not defined")
 
+    def _argument(self, node, local_env):
+        # the value of an argument, or with lazy=True a Thunk of it. a literal
+        # is its value and a parameter is passed on as it is, forced or not
+        if not self.lazy:
+            return self.visit(node, local_env)
+        if isinstance(node, (Num, Bool)):
+            return node.value
+        if isinstance(node, Var):
+            return dict(local_env).get(node.name)
+        return Thunk(lambda local_env: self.visit(node, local_env), local_env)
+
     def visit_AdvancedFuncOp(self, node, local_env):
         if isinstance(node.left, BinOp):
-            if isinstance(node.left.right, str):
-                if node.left.right == list(local_env.values())[0]:
+            if self.lazy and isinstance(node.left.right, (Var, Num)):
+                # the base case reads the first argument
+                for name, value in local_env.items():
+                    if value.__class__ is Thunk:
+                        local_env[name] = value.force()
+                    break
+            if isinstance(node.left.right, Var):
+                if node.left.right.name == list(local_env.values())[0]:
                     return list(local_env.values())[0]
 
             if isinstance(node.left.right, Num):
@@ -978,8 +1681,11 @@ class Interpreter:
 
         return self._evaluate(node.right, local_env)
 
-    def visit_str(self, node, local_env):
-        return dict(local_env).get(node)
+    def visit_Var(self, node, local_env):
+        value = dict(local_env).get(node.name)
+        if value.__class__ is Thunk:
+            return value.force()
+        return value
 
     def visit_FuncOp(self, node, local_env):
         return None
@@ -993,7 +1699,7 @@ class Interpreter:
             if (
                 method_name == "visit_BinOp"
                 or method_name == "visit_FuncCall"
-                or method_name == "visit_str"
+                or method_name == "visit_Var"
                 or method_name == "visit_LambdaExpr"
             ):
                 return visitor(node, local_env)
@@ -1031,16 +1737,2223 @@ class Interpreter:
         except TypeError as e:
             print(e)
 
+    # the compile stage: every node is turned once into a nested python closure
+    # that takes the local env, so running a body no longer re-dispatches on the
+    # node types. compile() mirrors visit() and _compile_evaluate() mirrors
+    # _evaluate(), including which of them catch and print a TypeError.
+
+    def compile_Num(self, node):
+        value = node.value
+        return lambda local_env: value
+
+    def compile_Bool(self, node):
+        value = node.value
+        return lambda local_env: value
+
+    def compile_Var(self, node):
+        if node.name not in self.scope:
+            return lambda local_env: None
+        slot = self.scope[node.name]
+        if not self.lazy:
+            return operator.itemgetter(slot)
+
+        def var(local_env):
+            value = local_env[slot]
+            if value.__class__ is Thunk:
+                value = local_env[slot] = value.force()
+            return value
+
+        return var
+
+    def _compile_argument(self, node):
+        # like _argument(): what a call puts in the frame for the argument
+        if not self.lazy:
+            return self.compile(node)
+        if isinstance(node, (Num, Bool)):
+            value = node.value
+            return lambda local_env: value
+        if isinstance(node, Var):
+            if node.name not in self.scope:
+                return lambda local_env: None
+            return operator.itemgetter(self.scope[node.name])
+        code = self.compile(node)
+        return lambda local_env: Thunk(code, local_env)
+
+    def compile_BinOp(self, node):
+        left = self.compile(node.left)
+        right = self.compile(node.right)
+        op = OPERATOR_SYMBOLS[node.op]
+
+        if op in ("+", "-", "*", "/", "%"):
+            arith = {
+                "+": operator.add,
+                "-": operator.sub,
+                "*": operator.mul,
+                "/": operator.floordiv,
+                "%": operator.mod,
+            }[op]
+            zero_error = {"/": "Division by zero", "%": "Modulo by zero"}.get(op)
+            # an operand proven to be an int can not be a bool, see infer_type()
+            check_left = infer_type(node.left, self.types) is not int
+            check_right = infer_type(node.right, self.types) is not int
+            self.checks_eliminated += 2 - check_left - check_right
+
+            if not check_left and not check_right:
+                if zero_error is None:
+                    return lambda local_env: arith(left(local_env), right(local_env))
+
+                def binop(local_env):
+                    left_val = left(local_env)
+                    right_val = right(local_env)
+                    if right_val == 0:
+                        raise RuntimeError(zero_error)
+                    return arith(left_val, right_val)
+
+            elif not check_left or not check_right:
+
+                def binop(local_env):
+                    left_val = left(local_env)
+                    right_val = right(local_env)
+                    if (left_val if check_left else right_val).__class__ is bool:
+                        raise TypeError("Type error")
+                    if zero_error is not None and right_val == 0:
+                        raise RuntimeError(zero_error)
+                    return arith(left_val, right_val)
+
+            elif zero_error is None:
+
+                def binop(local_env):
+                    left_val = left(local_env)
+                    right_val = right(local_env)
+                    if left_val.__class__ is bool or right_val.__class__ is bool:
+                        raise TypeError("Type error")
+                    return arith(left_val, right_val)
+
+            else:
+
+                def binop(local_env):
+                    left_val = left(local_env)
+                    right_val = right(local_env)
+                    if left_val.__class__ is bool or right_val.__class__ is bool:
+                        raise TypeError("Type error")
+                    if right_val == 0:
+                        raise RuntimeError(zero_error)
+                    return arith(left_val, right_val)
+
+            return binop
+
+        if op in ("&&", "||"):
+            is_and = op == "&&"
+            if self.short_circuit:
+                return self._compile_short_circuit(node, left, right, is_and)
+            if (
+                infer_type(node.left, self.types) is bool
+                and infer_type(node.right, self.types) is bool
+            ):
+                self.checks_eliminated += 2
+
+                # both operands are still evaluated, the right one can raise
+                def proven_logic(local_env):
+                    left_val = left(local_env)
+                    right_val = right(local_env)
+                    if is_and:
+                        return left_val and right_val
+                    return left_val or right_val
+
+                return proven_logic
+
+            def logic(local_env):
+                left_val = left(local_env)
+                right_val = right(local_env)
+                if left_val.__class__ is bool and right_val.__class__ is bool:
+                    if is_and:
+                        return left_val and right_val
+                    return left_val or right_val
+                raise TypeError("one of the Operands is not bool")
+
+            return logic
+
+        compare = {
+            "==": operator.eq,
+            "!=": operator.ne,
+            ">": operator.gt,
+            "<": operator.lt,
+            ">=": operator.ge,
+            "<=": operator.le,
+        }.get(op)
+
+        if compare is None:
+
+            def unknown(local_env):
+                left(local_env)
+                right(local_env)
+                raise TypeError("Type error")
+
+            return unknown
+
+        return lambda local_env: compare(left(local_env), right(local_env))
+
+    def _compile_short_circuit(self, node, left, right, is_and):
+        # the right operand runs only if the left one did not decide the result
+        if (
+            infer_type(node.left, self.types) is bool
+            and infer_type(node.right, self.types) is bool
+        ):
+            self.checks_eliminated += 2
+            if is_and:
+                return lambda local_env: left(local_env) and right(local_env)
+            return lambda local_env: left(local_env) or right(local_env)
+
+        def short_circuit(local_env):
+            left_val = left(local_env)
+            if left_val.__class__ is not bool:
+                raise TypeError("one of the Operands is not bool")
+            if left_val is not is_and:
+                return left_val
+            right_val = right(local_env)
+            if right_val.__class__ is not bool:
+                raise TypeError("one of the Operands is not bool")
+            return right_val
+
+        return short_circuit
+
+    def compile_UnaryOp(self, node):
+        # like visit_UnaryOp the operand is evaluated without the local env
+        scope, types = self.scope, self.types
+        self.scope, self.types = {}, {}
+        try:
+            expr = self.compile(node.expr)
+            proven = node.op == OP_NOT and infer_type(node.expr, {}) is bool
+        finally:
+            self.scope, self.types = scope, types
+
+        if proven:
+            self.checks_eliminated += 1
+            return lambda local_env: not expr(())
+
+        def unary(local_env):
+            expr_val = expr(())
+            if node.op == OP_NOT and expr_val.__class__ is bool:
+                return not expr_val
+            raise TypeError("Type error")
+
+        return unary
+
+    def compile_LambdaExpr(self, node):
+        return self.compile(node.body)
+
+    def _compile_call_frame(self, node, args=None, types=None):
+        # looks the function up when the call runs (it can be redefined) and
+        # returns its compiled body together with the new local env, a list
+        # with one slot per distinct parameter name. args are the compiled
+        # arguments if the caller already has them, types the proven classes
+        # of the parameters where they were compiled
+        name = node.name
+        global_env = self.global_env
+
+        if node.args and isinstance(node.args[0], FuncOp):
+            first = self._compile_argument(node.args[0].left)
+            second = self._compile_argument(node.args[0].right)
+
+            def frame(local_env2):
+                if name not in global_env:
+                    raise RuntimeError(f"Function {name} is not defined")
+                params, body, code, slots = global_env[name]
+                if slots is None:
+                    local_env = [None] * len(params)
+                    slots = range(len(params))
+                else:
+                    local_env = [None] * (max(slots) + 1)
+                # a missing params[1] fails only after the first argument ran
+                slot = slots[0]
+                local_env[slot] = first(local_env2)
+                slot = slots[1]
+                local_env[slot] = second(local_env2)
+                return code, local_env
+
+            return frame
+
+        if not node.args:
+            # visit_FuncCall looks at node.args[0] before anything else
+            def frame(local_env2):
+                if name not in global_env:
+                    raise RuntimeError(f"Function {name} is not defined")
+                return node.args[0]
+
+            return frame
+
+        if args is None:
+            args = [self._compile_argument(arg) for arg in node.args]
+        argc = len(args)
+        if types is None:
+            types = self.types
+        arg_types = [infer_type(arg, types) for arg in node.args]
+        # the callee this call last ran, the code it runs for it, and the
+        # parameter checks the argument classes proven here left to do. the
+        # callee only changes when it is redefined
+        last = [None, None, None]
+        select = self._select_specialized
+
+        def frame(local_env2):
+            if name not in global_env:
+                raise RuntimeError(f"Function {name} is not defined")
+            params, body, code, slots = global_env[name]
+            if argc != len(params):
+                raise RuntimeError(
+                    f"Function {name} expects {len(params)} arguments, got {argc}"
+                )
+            if slots is None:
+                local_env = [arg(local_env2) for arg in args]
+                if code is not last[0]:
+                    last[:] = code, *select(code, arg_types)
+                checks = last[2]
+                if checks is None:
+                    return last[1], local_env
+                for i, kind in checks:
+                    if local_env[i].__class__ is not kind:
+                        return code, local_env
+                return last[1], local_env
+            local_env = [None] * (max(slots) + 1)
+            for i in range(argc):
+                local_env[slots[i]] = args[i](local_env2)
+            return code, local_env
+
+        return frame
+
+    def _inline_body(self, name, entry):
+        # what _compile_inlined() needs of the function, worked out once: the
+        # body is compiled for a frame of its own and not in tail position, so
+        # a call it makes returns its value. None instead of the body if the
+        # function reaches itself, is too large, memoized or takes duplicate
+        # parameter names
+        if name in self.inlined:
+            return self.inlined[name]
+        params, body, code, slots = entry
+        reached = self.reachable(name)
+        nodes = count_nodes(body)
+        compiled = None
+        if (
+            slots is None
+            and code not in self.memo_tables
+            and name not in reached
+            and nodes <= self.inline
+        ):
+            saved = self.scope, self.types, self.defining, self.inline_left
+            self.scope, self.types = resolve_slots(params)[0], {}
+            self.defining, self.inline_left = None, self.inline - nodes
+            try:
+                compiled = self._compile_evaluate(body)
+                nodes = self.inline - self.inline_left
+            finally:
+                self.scope, self.types, self.defining, self.inline_left = saved
+        self.inlined[name] = ([True], compiled, nodes, reached)
+        return self.inlined[name]
+
+    def _compile_inlined(self, node):
+        # ([valid], compiled body) of the called function if the call is
+        # inlined, None if the function is not defined yet, is profiled, is
+        # called another way or reaches the Defun being compiled (whose calls
+        # in tail position have to stay jumps of the trampoline)
+        entry = self.global_env.get(node.name)
+        if (
+            not self.inline
+            or entry is None
+            or self.profiler is not None
+            or not isinstance(node.args, list)
+            or not node.args
+            or isinstance(node.args[0], FuncOp)
+            or len(node.args) != len(entry[0])
+            or node.name == self.defining
+        ):
+            return None
+        valid, body, nodes, reached = self._inline_body(node.name, entry)
+        # the calls inlined into one body share what is left of the budget,
+        # so a whole expansion stays within self.inline nodes
+        left = self.inline if self.inline_left is None else self.inline_left
+        if body is None or nodes > left or self.defining in reached:
+            return None
+        if self.inline_left is not None:
+            self.inline_left -= nodes
+        return valid, body
+
+    def _compile_lazy_frame(self, node, args):
+        # the call frame of an inlined call, only compiled once the call can
+        # not run inlined (the callee was defined again or limits are set)
+        types = self.types
+        compiled = []
+
+        def frame(local_env2):
+            if not compiled:
+                compiled.append(self._compile_call_frame(node, args, types))
+            return compiled[0](local_env2)
+
+        return frame
+
+    def compile_FuncCall(self, node):
+        inlined = self._compile_inlined(node)
+        call = self._call
+
+        if inlined is not None:
+            valid, body = inlined
+            args = [self._compile_argument(arg) for arg in node.args]
+            frame = self._compile_lazy_frame(node, args)
+
+            # runs the body like a call of it would, unless it was defined
+            # again since or limits (which count the calls) are set
+            def inlined_call(local_env):
+                if valid[0] and not self.limited:
+                    return body([arg(local_env) for arg in args])
+                code, local_env2 = frame(local_env)
+                return call(code, local_env2)
+
+            return inlined_call
+
+        frame = self._compile_call_frame(node)
+
+        def func_call(local_env):
+            code, local_env2 = frame(local_env)
+            return call(code, local_env2)
+
+        return func_call
+
+    def _compile_tail_call(self, node, discard):
+        # a call in tail position hands the callee back to the trampoline in
+        # _call() instead of calling it, so it costs no python frame
+        inlined = self._compile_inlined(node)
+        if inlined is None:
+            frame = self._compile_call_frame(node)
+        else:
+            args = [self._compile_argument(arg) for arg in node.args]
+            frame = self._compile_lazy_frame(node, args)
+
+        def tail_call(local_env):
+            try:
+                code, local_env2 = frame(local_env)
+            except TypeError as e:
+                self.prints += 1
+                print(e)
+                return None
+            return TailCall(code, local_env2, discard)
+
+        if inlined is None:
+            return tail_call
+
+        valid, body = inlined
+
+        # an inlined function reaches no Defun calling it, so its body can
+        # run right here instead of being jumped to
+        def inlined_tail_call(local_env):
+            if not valid[0] or self.limited:
+                return tail_call(local_env)
+            try:
+                local_env2 = [arg(local_env) for arg in args]
+            except TypeError as e:
+                self.prints += 1
+                print(e)
+                return None
+            result = body(local_env2)
+            if discard:
+                return None
+            return result
+
+        return inlined_tail_call
+
+    def _call(self, code, local_env):
+        if self.memo_tables or self.limited:
+            return self._call_checked(code, local_env)
+
+        result = code(local_env)
+        if result.__class__ is not TailCall:
+            return result
+
+        # the result of a call made from a FuncOp sequence is thrown away, so
+        # once such a call was jumped to the whole chain evaluates to None
+        discard = False
+        calls = 0
+        max_calls = self.max_tail_calls
+        while result.__class__ is TailCall:
+            calls += 1
+            if max_calls is not None and calls > max_calls:
+                raise RecursionError("maximum recursion depth exceeded")
+            discard = discard or result.discard
+            result = result.code(result.local_env)
+        if discard:
+            return None
+        return result
+
+    def call_many(self, name, arg_tuples, vectorize=False):
+        # calls the Defun name once for every tuple of argument values and
+        # yields the results in order, reusing its compiled body without any
+        # lexing or parsing. an error is printed and gives None, like it does
+        # for a statement passed to interpret().
+        # vectorize=True evaluates a body of pure integer arithmetic over all
+        # the tuples at once with numpy (when it is installed), arguments it
+        # cannot evaluate exactly go through the calls one by one instead
+        if name not in self.global_env:
+            raise RuntimeError(f"Function {name} is not defined")
+        params, body, code, slots = self.global_env[name]
+
+        if vectorize:
+            stored = self.vector_nodes.get(name)
+            if stored is None or stored[0] is not body:
+                nodes = count_nodes(body) if is_integer_arithmetic(body, params) else 0
+                stored = self.vector_nodes[name] = (body, nodes)
+            if stored[1] and load_numpy() is not None:
+                # the tuples are only loaded all at once for numpy, whether the
+                # batch reaches VECTOR_MIN_NODES is found by reading at most the
+                # tuples that takes. otherwise they are read as the calls run
+                needed = -(-VECTOR_MIN_NODES // stored[1])
+                arg_tuples = iter(arg_tuples)
+                batch = list(itertools.islice(arg_tuples, needed))
+                if len(batch) == needed:
+                    batch.extend(arg_tuples)
+                    results = self._call_vectorized(params, body, batch)
+                    if results is not None:
+                        yield from results
+                        return
+                arg_tuples = batch
+
+        for args in arg_tuples:
+            try:
+                if len(args) != len(params):
+                    raise RuntimeError(
+                        f"Function {name} expects {len(params)} arguments, got {len(args)}"
+                    )
+                if not self.compiled:
+                    local_env = {params[i]: args[i] for i in range(len(params))}
+                    result = self._evaluate(body, local_env)
+                elif slots is None:
+                    result = self._call(code, list(args))
+                else:
+                    local_env = [None] * (max(slots) + 1)
+                    for i in range(len(args)):
+                        local_env[slots[i]] = args[i]
+                    result = self._call(code, local_env)
+            except BudgetExceeded:
+                raise
+            except RuntimeError as e:
+                print(e)
+                result = None
+            yield result
+
+    def _call_vectorized(self, params, body, arg_tuples):
+        # one int64 column per parameter, None if some tuple needs the checks
+        # of the scalar path (a wrong arity, a bool or a too large value). the
+        # tuples are checked by passes that run in C and numpy, a python loop
+        # over every value would cost more than the calls it replaces
+        if set(map(len, arg_tuples)) != {len(params)}:
+            return None
+        values = list(itertools.chain.from_iterable(arg_tuples))
+        if set(map(type, values)) != {int}:
+            return None
+        try:
+            table = numpy.fromiter(values, dtype=numpy.int64, count=len(values))
+        except OverflowError:
+            return None
+        table = table.reshape(len(arg_tuples), len(params))
+
+        columns = {}
+        bounds = {}
+        for i, param in enumerate(params):
+            column = table[:, i]
+            # -(-2**63) is not an int64, so the bound is taken as a python int
+            bound = max(int(column.max()), -int(column.min()))
+            if bound > VECTOR_LIMIT:
+                return None
+            columns[param] = column
+            bounds[param] = bound
+
+        result = self._vector_column(body, columns, bounds)
+        if result is None:
+            return None
+        values, bound = result
+        return numpy.broadcast_to(values, (len(arg_tuples),)).tolist()
+
+    def _vector_column(self, node, columns, bounds):
+        # returns (values, bound): the values of node for all the tuples and
+        # a bound of their magnitude, or None when a division by zero or an
+        # int64 overflow is possible
+        if isinstance(node, LambdaExpr):
+            return self._vector_column(node.body, columns, bounds)
+        if isinstance(node, Num):
+            if abs(node.value) > VECTOR_LIMIT:
+                return None
+            return numpy.int64(node.value), abs(node.value)
+        if isinstance(node, Var):
+            return columns[node.name], bounds[node.name]
+
+        left = self._vector_column(node.left, columns, bounds)
+        right = self._vector_column(node.right, columns, bounds)
+        if left is None or right is None:
+            return None
+        (left_val, left_bound), (right_val, right_bound) = left, right
+
+        if node.op in (OP_DIV, OP_MOD):
+            if (right_val == 0).any():
+                return None
+            # |a // b| <= |a| and |a % b| < |b| for any b != 0
+            if node.op == OP_DIV:
+                return numpy.floor_divide(left_val, right_val), left_bound
+            return numpy.mod(left_val, right_val), right_bound
+
+        if node.op == OP_MUL:
+            bound = left_bound * right_bound
+        else:
+            bound = left_bound + right_bound
+        if bound > VECTOR_LIMIT:
+            return None
+        if node.op == OP_ADD:
+            return left_val + right_val, bound
+        if node.op == OP_SUB:
+            return left_val - right_val, bound
+        return left_val * right_val, bound
+
+    def evaluate_statement(self, statement):
+        # what interpret() evaluates for one entry of its statement list
+        if self.compiled:
+            return self._call(self._compile_evaluate(statement), [])
+        return self._evaluate(statement, {})
+
+    def set_limits(self, max_steps=None, timeout=None, max_depth=None):
+        # from now on a program may evaluate at most max_steps bodies (every
+        # call is one step), nest at most max_depth calls that are not in tail
+        # position (those cost python frames) and run for at most timeout
+        # seconds, past any of them a BudgetExceeded ends it. set_limits()
+        # without arguments lifts them
+        self.steps = 0
+        self.depth = 0
+        self.deepest = 0
+        self.max_steps = max_steps
+        self.max_depth = max_depth
+        self.started = time.perf_counter()
+        self.deadline = None if timeout is None else self.started + timeout
+        self.limited = max_steps is not None or timeout is not None or max_depth is not None
+
+    def _exceeded(self, limit):
+        return BudgetExceeded(
+            limit, self.steps, self.depth, self.deepest, time.perf_counter() - self.started
+        )
+
+    def _step(self):
+        self.steps += 1
+        if self.max_steps is not None and self.steps > self.max_steps:
+            raise self._exceeded("step")
+        # reading the clock costs about as much as a step, so it is read once
+        # every DEADLINE_CHECK_STEPS steps
+        if (
+            self.deadline is not None
+            and self.steps % DEADLINE_CHECK_STEPS == 0
+            and time.perf_counter() > self.deadline
+        ):
+            raise self._exceeded("time")
+
+    def _enter(self):
+        # one more nested call, the caller takes it back off self.depth
+        self.depth += 1
+        if self.depth > self.deepest:
+            self.deepest = self.depth
+        if self.max_depth is not None and self.depth > self.max_depth:
+            raise self._exceeded("call depth")
+
+    def _call_checked(self, code, local_env):
+        # a call of _call() made inside a body nests one level deeper, the
+        # calls its trampoline jumps to do not
+        limited = self.limited
+        if limited:
+            self._enter()
+            try:
+                return self._trampoline(code, local_env, limited)
+            finally:
+                self.depth -= 1
+        return self._trampoline(code, local_env, limited)
+
+    def _trampoline(self, code, local_env, limited):
+        # the trampoline of _call() with a step for every body it evaluates,
+        # and every memoized function the chain jumps to is looked up first.
+        # on a miss its result is stored once the chain ended: the result of
+        # the chain, or None if a call made from a FuncOp sequence was jumped
+        # to after it
+        tables = self.memo_tables
+        pending = []
+        calls = 0
+        max_calls = self.max_tail_calls
+        last_discard = -1
+        while True:
+            table = tables.get(code)
+            if table is not None:
+                if self.lazy:
+                    # like an argument of a tail call that raised, see
+                    # _compile_tail_call()
+                    try:
+                        force_arguments(local_env)
+                    except TypeError as e:
+                        self.prints += 1
+                        print(e)
+                        result = None
+                        break
+                key = memo_key(local_env)
+                entries = table.entries
+                if key in entries:
+                    table.hits += 1
+                    entries.move_to_end(key)
+                    result = entries[key]
+                    break
+                table.misses += 1
+                pending.append((table, key, calls, self.prints))
+
+            if limited:
+                self._step()
+            result = code(local_env)
+            if result.__class__ is not TailCall:
+                break
+            if result.discard:
+                last_discard = calls
+            calls += 1
+            if max_calls is not None and calls > max_calls:
+                raise RecursionError("maximum recursion depth exceeded")
+            code = result.code
+            local_env = result.local_env
+
+        for table, key, start, prints in pending:
+            if prints == self.prints:
+                table.put(key, None if last_discard >= start else result)
+        if last_discard >= 0:
+            return None
+        return result
+
+    def compile(self, node):
+        compiler = getattr(self, "compile_" + type(node).__name__, None)
+
+        if compiler:
+            code = compiler(node)
+            if self.profiler is not None and isinstance(node, BinOp):
+                return self.profiler.wrap_operator(OPERATOR_SYMBOLS[node.op], code)
+            return code
+        # anything the closures do not cover keeps the behaviour of visit()
+        return lambda local_env: self.visit(node, local_env)
+
+    def _compile_advancedFuncOp(self, node, tail):
+        base_case = None
+        if isinstance(node.left, BinOp):
+            if isinstance(node.left.right, Var):
+                base_case = node.left.right.name
+            if isinstance(node.left.right, Num):
+                base_case = node.left.right.value
+        has_base_case = base_case is not None
+
+        if isinstance(node.right, FuncOp):
+            printed = self._compile_evaluate(node.right.right)
+
+            if tail and isinstance(node.right.left, FuncCall):
+                # the sequence evaluates to None whatever the call returns, so
+                # the call is still the last thing that runs here
+                repeated = self._compile_tail_call(node.right.left, discard=True)
+
+                def advanced(local_env):
+                    if has_base_case and base_case == local_env[0]:
+                        return local_env[0]
+                    self.prints += 1
+                    print(printed(local_env))
+                    return repeated(local_env)
+
+                return advanced
+
+            repeated = self._compile_evaluate(node.right.left)
+
+            def advanced(local_env):
+                if has_base_case and base_case == local_env[0]:
+                    return local_env[0]
+                self.prints += 1
+                print(printed(local_env))
+                repeated(local_env)
+                return None
+
+            return advanced
+
+        right = self._compile_evaluate(node.right, tail)
+
+        def advanced(local_env):
+            if has_base_case and base_case == local_env[0]:
+                return local_env[0]
+            return right(local_env)
+
+        return advanced
+
+    def _compile_evaluate(self, node, tail=False):
+        # tail=True marks the node as the last thing its body evaluates, which
+        # lets a call there be compiled by _compile_tail_call()
+        if isinstance(node, list):  # multiple statements
+            # a statement is not the body of a call, so the call it makes is a
+            # plain call: the trampoline only counts the jumps of Defun bodies
+            statements = [self._compile_evaluate(statement) for statement in node]
+            call = self._call
+            return lambda local_env: [call(code, local_env) for code in statements]
+        elif isinstance(node, (Num, Bool)):
+            return self.compile(node)
+        elif isinstance(node, FuncDef):
+            return lambda local_env: self.visit_FuncDef(node)
+        elif isinstance(node, FuncCall) and tail:
+            return self._compile_tail_call(node, discard=False)
+        elif isinstance(node, (BinOp, UnaryOp, LambdaExpr, FuncCall)):
+            code = self.compile(node)
+        elif isinstance(node, advancedFuncOp):
+            code = self._compile_advancedFuncOp(node, tail)
+            if (
+                self.lazy
+                and isinstance(node.left, BinOp)
+                and isinstance(node.left.right, (Var, Num))
+            ):
+                code = self._compile_forced_first(code)
+        else:
+            return lambda local_env: None
+
+        def evaluate(local_env):
+            try:
+                return code(local_env)
+            except TypeError as e:
+                self.prints += 1
+                print(e)
+
+        return evaluate
+
+    def _compile_forced_first(self, code):
+        # the base case reads the first argument of a lazy call
+        def forced(local_env):
+            if local_env and local_env[0].__class__ is Thunk:
+                local_env[0] = local_env[0].force()
+            return code(local_env)
+
+        return forced
+
     def interpret(self, statements):
         try:
-            ans = self._evaluate(statements, {})
+            if self.compiled:
+                ans = self._compile_evaluate(statements)([])
+            else:
+                ans = self._evaluate(statements, {})
             if ans is None or ans == "":
                 raise RuntimeError("Runtime Error")
             return ans
+        except BudgetExceeded:
+            raise
         except RuntimeError as e:
             print(e)
 
 
+# CODE GENERATION
+# a Defun whose body only holds numbers, bools, its parameters, operators,
+# lambd, calls and base cases without a FuncOp sequence is translated into the
+# source of one python function of its parameters, which compile() turns into
+# bytecode once when the Defun runs. the function keeps every check of the
+# closures (bool operands, division and modulo by zero, a TypeError printed by
+# the body) but not their frames: a call of a generated function is a plain
+# python call, and a call of the Defun itself in tail position jumps back to
+# the start of the body. a call of any other function, or any call made while
+# limits are set, runs the closure compile() built for it instead
+
+
+class CannotGenerate(Exception):
+    # raised for a node the code generator does not translate, the Defun then
+    # keeps only its closures
+    pass
+
+
+class CodeGenerator:
+    def __init__(self, interpreter, node, layout):
+        # the closures of the calls are compiled right away, so interpreter.scope
+        # has to be the layout of the Defun while the generator runs
+        self.interpreter = interpreter
+        self.node = node
+        self.layout = layout
+        self.params = [f"p{i}" for i in range(len(node.params))]
+        # the list frame of the current call, what a closure of a call expects
+        self.frame = "[" + ", ".join(self.params) + "]"
+        self.lines = []
+        self.names = 0
+        self.jumps = False
+        self.namespace = {
+            "native": interpreter.native,
+            "interp": interpreter,
+            "call": interpreter._call,
+            "TailCall": TailCall,
+        }
+
+    def generate(self):
+        # (python function, its source) of the Defun, or None if the body
+        # holds something that is not translated
+        if not self.params:
+            return None
+        try:
+            self.statement(self.node.body, 3)
+        except CannotGenerate:
+            return None
+
+        lines = [f"def generated({', '.join(self.params)}):"]
+        if self.jumps:
+            lines += [
+                "    jumps = 0",
+                "    max_jumps = interp.max_tail_calls",
+                "    while True:",
+            ]
+            indent = ""
+        else:
+            # without a jump to the start the body needs no loop around it
+            indent = "    "
+        lines.append("        try:"[len(indent):])
+        lines += [line[len(indent):] for line in self.lines]
+        lines += [
+            line[len(indent):]
+            for line in (
+                "        except TypeError as e:",
+                "            interp.prints += 1",
+                "            print(e)",
+                "            return None",
+                # python names where it ran out of frames ("... in comparison"),
+                # which is always a call for the closures
+                "        except RecursionError:",
+                '            raise RecursionError("maximum recursion depth exceeded") from None',
+            )
+        ]
+        source = "\n".join(lines) + "\n"
+        exec(compile(source, f"<Defun {self.node.name}>", "exec"), self.namespace)
+        return self.namespace["generated"], source
+
+    def emit(self, indent, line):
+        self.lines.append("    " * indent + line)
+
+    def temporary(self, prefix="t"):
+        self.names += 1
+        return f"{prefix}{self.names}"
+
+    def closure(self, code):
+        name = self.temporary("closure")
+        self.namespace[name] = code
+        return name
+
+    def arguments(self, node):
+        # the number of arguments of a call _compile_call_frame() would build
+        # a plain frame for
+        if not isinstance(node.args, list) or not node.args:
+            raise CannotGenerate("call without a list of arguments")
+        if isinstance(node.args[0], FuncOp):
+            raise CannotGenerate("call with a FuncOp argument")
+        return len(node.args)
+
+    def statement(self, node, indent):
+        # emits the return of node evaluated the way _compile_evaluate(node,
+        # tail=True) does
+        if isinstance(node, (list, FuncDef, UnaryOp)):
+            raise CannotGenerate(type(node).__name__)
+        if isinstance(node, FuncCall):
+            self.tail_call(node, indent)
+        elif isinstance(node, (Num, Bool, BinOp, LambdaExpr)):
+            self.emit(indent, f"return {self.expression(node, indent)}")
+        elif isinstance(node, advancedFuncOp):
+            if isinstance(node.right, FuncOp):
+                raise CannotGenerate("FuncOp sequence")
+            base_case = None
+            if isinstance(node.left, BinOp):
+                if isinstance(node.left.right, Var):
+                    base_case = node.left.right.name
+                if isinstance(node.left.right, Num):
+                    base_case = node.left.right.value
+            if base_case is not None:
+                self.emit(indent, f"if {base_case!r} == p0:")
+                self.emit(indent + 1, "return p0")
+            self.statement(node.right, indent)
+        else:
+            self.emit(indent, "return None")
+
+    def expression(self, node, indent):
+        # emits the statements evaluating node the way compile(node) does, and
+        # returns the literal or the name that holds its value
+        if isinstance(node, (Num, Bool)):
+            if node.value.__class__ not in (int, bool):
+                raise CannotGenerate("literal")
+            return repr(node.value)
+        if isinstance(node, Var):
+            if node.name in self.layout:
+                return self.params[self.layout[node.name]]
+            return "None"
+        if isinstance(node, LambdaExpr):
+            return self.expression(node.body, indent)
+        if isinstance(node, BinOp):
+            return self.binop(node, indent)
+        if isinstance(node, FuncCall):
+            return self.call(node, indent)
+        raise CannotGenerate(type(node).__name__)
+
+    def class_of(self, value):
+        # 5.__class__ would read as a float literal
+        if value.lstrip("-").isdigit():
+            return f"({value}).__class__"
+        return f"{value}.__class__"
+
+    def binop(self, node, indent):
+        if self.interpreter.short_circuit and node.op in (OP_AND, OP_OR):
+            return self.short_circuit(node, indent)
+        left = self.expression(node.left, indent)
+        right = self.expression(node.right, indent)
+        result = self.temporary()
+        op = OPERATOR_SYMBOLS[node.op]
+
+        if op in ("+", "-", "*", "/", "%"):
+            # an int literal is never a bool and a literal other than 0 never
+            # divides by zero, so those checks are left out
+            checks = [
+                f"{value}.__class__ is bool"
+                for value in (left, right)
+                if not value.lstrip("-").isdigit()
+            ]
+            if checks:
+                self.emit(indent, f"if {' or '.join(checks)}:")
+                self.emit(indent + 1, 'raise TypeError("Type error")')
+            if op in ("/", "%") and not (right.lstrip("-").isdigit() and int(right) != 0):
+                self.emit(indent, f"if {right} == 0:")
+                error = "Division by zero" if op == "/" else "Modulo by zero"
+                self.emit(indent + 1, f'raise RuntimeError("{error}")')
+            self.emit(indent, f"{result} = {left} {'//' if op == '/' else op} {right}")
+        elif op in ("&&", "||"):
+            self.emit(
+                indent,
+                f"if {self.class_of(left)} is not bool or {self.class_of(right)} is not bool:",
+            )
+            self.emit(indent + 1, 'raise TypeError("one of the Operands is not bool")')
+            self.emit(indent, f"{result} = {left} {'and' if op == '&&' else 'or'} {right}")
+        elif op in ("==", "!=", ">", "<", ">=", "<="):
+            self.emit(indent, f"{result} = {left} {op} {right}")
+        else:
+            self.emit(indent, 'raise TypeError("Type error")')
+            return "None"
+        return result
+
+    def short_circuit(self, node, indent):
+        # the statements of the right operand go in the branch taken when the
+        # left one did not decide the result
+        result = self.temporary()
+        self.emit(indent, f"{result} = {self.expression(node.left, indent)}")
+        self.emit(indent, f"if {result}.__class__ is not bool:")
+        self.emit(indent + 1, 'raise TypeError("one of the Operands is not bool")')
+        self.emit(indent, f"if {'' if node.op == OP_AND else 'not '}{result}:")
+        right = self.expression(node.right, indent + 1)
+        self.emit(indent + 1, f"if {self.class_of(right)} is not bool:")
+        self.emit(indent + 2, 'raise TypeError("one of the Operands is not bool")')
+        self.emit(indent + 1, f"{result} = {right}")
+        return result
+
+    def call(self, node, indent):
+        # a generated function with the same number of parameters is called
+        # directly, its arguments evaluated only once that is known
+        argc = self.arguments(node)
+        closure = self.closure(self.interpreter.compile(node))
+        function = self.temporary("f")
+        result = self.temporary()
+        self.emit(indent, f"{function} = native.get({(node.name, argc)!r})")
+        self.emit(indent, f"if {function} is None or interp.limited:")
+        self.emit(indent + 1, f"{result} = {closure}({self.frame})")
+        self.emit(indent, "else:")
+        args = [self.expression(arg, indent + 1) for arg in node.args]
+        self.emit(indent + 1, f"{result} = {function}({', '.join(args)})")
+        # it called a closure in tail position that left the rest to _call()
+        self.emit(indent + 1, f"if {result}.__class__ is TailCall:")
+        self.emit(indent + 2, f"{result} = call({result}.code, {result}.local_env)")
+        return result
+
+    def tail_call(self, node, indent):
+        argc = self.arguments(node)
+        closure = self.closure(self.interpreter._compile_tail_call(node, discard=False))
+        if node.name != self.node.name or argc != len(self.params):
+            self.emit(indent, f"return {closure}({self.frame})")
+            return
+
+        # a Defun cannot be redefined while it runs, so the call of its own
+        # name in tail position is a jump, counted like the trampoline does
+        self.jumps = True
+        self.emit(indent, "if interp.limited:")
+        self.emit(indent + 1, f"return {closure}({self.frame})")
+        args = [self.expression(arg, indent) for arg in node.args]
+        self.emit(indent, "jumps += 1")
+        self.emit(indent, "if max_jumps is not None and jumps > max_jumps:")
+        self.emit(indent + 1, 'raise RecursionError("maximum recursion depth exceeded")')
+        self.emit(indent, f"{', '.join(self.params)}, = {', '.join(args)},")
+        self.emit(indent, "continue")
+
+
+# PROFILER
+# the time of a call is measured from when its body starts until it returns a
+# value, or hands a call in tail position to the trampoline: such a call runs
+# after its caller ended (it does not nest, like it costs no python frame)
+
+
+class FunctionProfile:
+    __slots__ = ("calls", "total", "own", "depth", "max_depth", "memoizable", "seen", "repeated")
+
+    def __init__(self, memoizable):
+        self.calls = 0
+        # seconds from the first call to the return of the outermost one, and
+        # seconds spent in the body itself without the calls it made
+        self.total = 0.0
+        self.own = 0.0
+        self.depth = 0
+        self.max_depth = 0
+        # calls of a function that cannot print, with arguments it already had
+        self.memoizable = memoizable
+        self.seen = set()
+        self.repeated = 0
+
+
+class Profiler:
+    def __init__(self):
+        self.functions = {}
+        self.operators = {}
+        # (call path, start, seconds of the calls it made) of the running calls
+        self.stack = []
+        # seconds spent in the body of the last function of a call path
+        self.paths = {}
+
+    def wrap_function(self, name, code, memoizable):
+        profile = self.functions.get(name)
+        if profile is None:
+            profile = self.functions[name] = FunctionProfile(memoizable)
+        # a redefinition that can print makes the name not memoizable
+        profile.memoizable = profile.memoizable and memoizable
+        stack = self.stack
+        paths = self.paths
+        clock = time.perf_counter
+
+        def profiled(local_env):
+            profile.calls += 1
+            if profile.memoizable:
+                key = memo_key(local_env)
+                if key in profile.seen:
+                    profile.repeated += 1
+                else:
+                    profile.seen.add(key)
+            profile.depth += 1
+            if profile.depth > profile.max_depth:
+                profile.max_depth = profile.depth
+            path = stack[-1][0] + ";" + name if stack else name
+            frame = [path, clock(), 0.0]
+            stack.append(frame)
+            try:
+                return code(local_env)
+            finally:
+                elapsed = clock() - frame[1]
+                stack.pop()
+                profile.depth -= 1
+                own = elapsed - frame[2]
+                profile.own += own
+                paths[path] = paths.get(path, 0.0) + own
+                # the time of a recursive call is already in the outermost one
+                if profile.depth == 0:
+                    profile.total += elapsed
+                if stack:
+                    stack[-1][2] += elapsed
+
+        return profiled
+
+    def wrap_operator(self, op, code):
+        operators = self.operators
+        operators.setdefault(op, 0)
+
+        def counted(local_env):
+            operators[op] += 1
+            return code(local_env)
+
+        return counted
+
+    def to_dict(self):
+        return {
+            "functions": {
+                name: {
+                    "calls": profile.calls,
+                    "total_seconds": profile.total,
+                    "self_seconds": profile.own,
+                    "max_depth": profile.max_depth,
+                    "memoizable": profile.memoizable,
+                    "repeated_calls": profile.repeated,
+                }
+                for name, profile in self.functions.items()
+            },
+            "operators": dict(self.operators),
+        }
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), indent=2)
+
+    def table(self):
+        lines = [
+            f"{'function':<20} {'calls':>10} {'total s':>10} {'self s':>10} {'max depth':>10} {'repeated':>10}"
+        ]
+        for name, profile in sorted(
+            self.functions.items(), key=lambda item: item[1].own, reverse=True
+        ):
+            repeated = profile.repeated if profile.memoizable else "-"
+            lines.append(
+                f"{name:<20} {profile.calls:>10} {profile.total:>10.6f} {profile.own:>10.6f}"
+                f" {profile.max_depth:>10} {repeated:>10}"
+            )
+        lines.append("")
+        lines.append(f"{'operator':<20} {'count':>10}")
+        for op, count in sorted(self.operators.items(), key=lambda item: item[1], reverse=True):
+            lines.append(f"{op:<20} {count:>10}")
+        return "\n".join(lines)
+
+    def collapsed(self):
+        # one "F;G;H microseconds" line per call path, the input of flamegraph.pl
+        return "\n".join(
+            f"{path} {round(seconds * 1e6)}" for path, seconds in sorted(self.paths.items())
+        )
+
+
+# OPTIMIZER
+# a pass between Parser.parse() and Interpreter.interpret(). it never changes
+# what a program evaluates to or prints: an operation that would raise is left
+# for the interpreter, and the condition of a base case is kept as it is since
+# only its shape is looked at (eg: (n == (2*3)) has no base case)
+
+
+def count_nodes(statements):
+    count = 0
+    nodes = [statements]
+    while nodes:
+        node = nodes.pop()
+        if isinstance(node, list):
+            nodes.extend(node)
+            continue
+        count += 1
+        if isinstance(node, (BinOp, FuncOp, advancedFuncOp)):
+            nodes.extend((node.left, node.right))
+        elif isinstance(node, UnaryOp):
+            nodes.append(node.expr)
+        elif isinstance(node, (LambdaExpr, FuncDef)):
+            nodes.append(node.body)
+        elif isinstance(node, FuncCall) and isinstance(node.args, list):
+            nodes.extend(node.args)
+    return count
+
+
+class Optimizer:
+    # verbose=True prints the node count of every program before and after
+    def __init__(self, verbose=False):
+        self.verbose = verbose
+        # operations on literals are folded by the tree walker itself, so a
+        # folded value is the one the interpreter would have computed
+        self.folder = Interpreter(compiled=False)
+
+    def optimize(self, statements):
+        before = count_nodes(statements)
+        statements = self.rewrite(statements, operand=False)
+        if self.verbose:
+            print(f"nodes before optimization: {before}, after: {count_nodes(statements)}")
+        return statements
+
+    # operand=True marks a node evaluated by visit() (an operand or a call
+    # argument), operand=False one evaluated by _evaluate() (a statement or
+    # a body), which gives a bare name None instead of its value
+    def rewrite(self, node, operand):
+        if isinstance(node, list):
+            return [self.rewrite(statement, operand) for statement in node]
+        elif isinstance(node, FuncDef):
+            return FuncDef(node.name, node.params, self.rewrite(node.body, False))
+        elif isinstance(node, advancedFuncOp):
+            return advancedFuncOp(node.left, node.op, self.rewrite(node.right, False))
+        elif isinstance(node, FuncOp):
+            return FuncOp(
+                self.rewrite(node.left, operand),
+                node.op,
+                self.rewrite(node.right, operand),
+            )
+        elif isinstance(node, BinOp):
+            return self.rewrite_BinOp(
+                BinOp(self.rewrite(node.left, True), node.op, self.rewrite(node.right, True))
+            )
+        elif isinstance(node, UnaryOp):
+            return self.rewrite_UnaryOp(UnaryOp(node.op, self.rewrite(node.expr, True)))
+        elif isinstance(node, LambdaExpr):
+            # a lambd ignores its params and evaluates its body in the env
+            # around it, so the body can take its place wherever visit() and
+            # _evaluate() treat the body alike
+            body = self.rewrite(node.body, operand)
+            if isinstance(body, (Num, Bool, BinOp, UnaryOp, FuncCall)) or (
+                operand and isinstance(body, Var)
+            ):
+                return body
+            return LambdaExpr(node.params, body)
+        elif isinstance(node, FuncCall) and isinstance(node.args, list):
+            return FuncCall(node.name, [self.rewrite(arg, True) for arg in node.args])
+        return node
+
+    def rewrite_BinOp(self, node):
+        left = node.left
+        right = node.right
+
+        if isinstance(left, (Num, Bool)) and isinstance(right, (Num, Bool)):
+            try:
+                return self.literal(self.folder.visit_BinOp(node, {}))
+            except (TypeError, RuntimeError):
+                return node
+
+        # x + 0, 0 + x, x - 0, x * 1, 1 * x and x / 1 give x back only if x
+        # is an int (True + 0 is a type error), which an arithmetic BinOp is
+        identity = {OP_ADD: 0, OP_SUB: 0, OP_MUL: 1, OP_DIV: 1}.get(node.op)
+        if identity is None:
+            return node
+        if node.op in (OP_ADD, OP_MUL) and self.is_int(left, identity):
+            if self.is_arithmetic(right):
+                return right
+        if self.is_int(right, identity) and self.is_arithmetic(left):
+            return left
+        return node
+
+    def rewrite_UnaryOp(self, node):
+        if node.op == OP_NOT and isinstance(node.expr, Bool):
+            return Bool(not node.expr.value)
+        return node
+
+    def literal(self, value):
+        if value.__class__ is bool:
+            return Bool(value)
+        return Num(value)
+
+    def is_int(self, node, value):
+        return isinstance(node, Num) and node.value.__class__ is int and node.value == value
+
+    def is_arithmetic(self, node):
+        return isinstance(node, BinOp) and node.op in ARITHMETIC_OPS
+
+
+# PROGRAM CACHE
+# a parsed program is stored as one flat tuple that lists the nodes in post
+# order: a tag and the fields of the node, after the nodes of its children.
+# this keeps even very deep trees flat enough for marshal.
+
+NODE_TAGS = {
+    Num: "N",
+    Bool: "B",
+    Var: "V",
+    BinOp: "O",
+    advancedFuncOp: "A",
+    FuncOp: "F",
+    UnaryOp: "U",
+    FuncCall: "C",
+    FuncDef: "D",
+    LambdaExpr: "L",
+}
+
+
+def dump_program(statements):
+    flat = []
+    stack = [(statement, False) for statement in reversed(statements)]
+    while stack:
+        node, children_done = stack.pop()
+        tag = NODE_TAGS[type(node)]
+
+        if not children_done:
+            if isinstance(node, (BinOp, advancedFuncOp, FuncOp)):
+                children = [node.left, node.right]
+            elif isinstance(node, UnaryOp):
+                children = [node.expr]
+            elif isinstance(node, FuncCall):
+                children = node.args
+            elif isinstance(node, (FuncDef, LambdaExpr)):
+                children = [node.body]
+            else:
+                children = []
+            stack.append((node, True))
+            for child in reversed(children):
+                stack.append((child, False))
+            continue
+
+        if isinstance(node, (Num, Bool)):
+            flat += [tag, node.value]
+        elif isinstance(node, Var):
+            flat += [tag, node.name]
+        elif isinstance(node, (BinOp, advancedFuncOp, FuncOp, UnaryOp)):
+            flat += [tag, node.op]
+        elif isinstance(node, FuncCall):
+            flat += [tag, node.name, len(node.args)]
+        elif isinstance(node, FuncDef):
+            flat += [tag, node.name, tuple(node.params)]
+        else:
+            flat += [tag, tuple(node.params)]
+
+    return zlib.compress(marshal.dumps((INTERPRETER_VERSION, tuple(flat))), 1)
+
+
+def load_program(data):
+    version, flat = marshal.loads(zlib.decompress(data))
+    if version != INTERPRETER_VERSION:
+        raise ValueError("the program was cached by another interpreter version")
+
+    nodes = []
+    i = 0
+    while i < len(flat):
+        tag = flat[i]
+        if tag == "N":
+            nodes.append(Num(flat[i + 1]))
+        elif tag == "B":
+            nodes.append(Bool(flat[i + 1]))
+        elif tag == "V":
+            nodes.append(Var(flat[i + 1]))
+        elif tag == "U":
+            nodes.append(UnaryOp(flat[i + 1], nodes.pop()))
+        elif tag == "L":
+            nodes.append(LambdaExpr(list(flat[i + 1]), nodes.pop()))
+        elif tag == "C":
+            count = flat[i + 2]
+            args = nodes[len(nodes) - count :]
+            del nodes[len(nodes) - count :]
+            nodes.append(FuncCall(flat[i + 1], args))
+            i += 1
+        elif tag == "D":
+            nodes.append(FuncDef(flat[i + 1], list(flat[i + 2]), nodes.pop()))
+            i += 1
+        else:
+            right = nodes.pop()
+            left = nodes.pop()
+            node_class = {"O": BinOp, "A": advancedFuncOp, "F": FuncOp}[tag]
+            nodes.append(node_class(left, flat[i + 1], right))
+        i += 2
+    return nodes
+
+
+class ProgramCache:
+    # parsed programs on disk, one file per key. reading an entry marks it as
+    # recently used and the least recently used entries are removed once the
+    # files take more than max_bytes
+    def __init__(self, directory=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def key(self, text, interpreter):
+        # the parser also looks at which functions are already defined
+        digest = hashlib.sha256()
+        digest.update(INTERPRETER_VERSION.encode())
+        digest.update(b"\0")
+        digest.update(",".join(sorted(interpreter.global_env)).encode())
+        digest.update(b"\0")
+        digest.update(text.encode())
+        return digest.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key + ".ast")
+
+    def get(self, key):
+        try:
+            with open(self.path(key), "rb") as file:
+                statements = load_program(file.read())
+            os.utime(self.path(key))
+            return statements
+        except (
+            OSError,
+            ValueError,
+            EOFError,
+            TypeError,
+            IndexError,
+            KeyError,
+            zlib.error,
+        ):
+            # a missing, damaged or outdated entry is parsed again
+            return None
+
+    def put(self, key, statements):
+        try:
+            data = dump_program(statements)
+            os.makedirs(self.directory, exist_ok=True)
+            temp = self.path(key) + f".{os.getpid()}.tmp"
+            with open(temp, "wb") as file:
+                file.write(data)
+            os.replace(temp, self.path(key))
+            self.evict()
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def evict(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".ast"):
+                stat = os.stat(os.path.join(self.directory, name))
+                entries.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(os.path.join(self.directory, name))
+            total -= size
+
+
+def evaluate(text, interpreter=None):
+    # the results of a text for code that embeds the language, or None when
+    # an error was printed instead (a syntax error raises an Exception)
+    if interpreter is None:
+        interpreter = Interpreter()
+    return interpreter.interpret(Parser(Lexer(text), interpreter).parse())
+
+
+def parse_program(text, interpreter, cache=None):
+    # the statements of a text, read from the cache when it was parsed before
+    if cache is None:
+        return Parser(Lexer(text), interpreter).parse()
+
+    key = cache.key(text, interpreter)
+    statements = cache.get(key)
+    if statements is None:
+        statements = Parser(Lexer(text), interpreter).parse()
+        cache.put(key, statements)
+    return statements
+
+
+# BYTECODE
+# a lower level form of a program than the AST: every Defun and every top
+# level statement becomes a BytecodeFunction, a stream of (instruction,
+# argument) int pairs in an array and the constants they refer to. the VM runs
+# them in one dispatch loop with an explicit stack of frames, so a deep
+# recursion does not use up the python stack. a compiled program can be saved
+# as a .lambdac file and run again without lexing or parsing (load_bytecode).
+# the compiler follows _compile_evaluate() and compile(), so the VM prints the
+# same type errors, jumps the same tail calls and returns the same base cases
+# as the closures do. memoization, limits, profiling and codegen are not
+# supported by the VM.
+
+(
+    LOAD_CONST,
+    LOAD_LOCAL,
+    BINARY,
+    UNARY,
+    FUNCTION,
+    CALL,
+    TAIL_CALL,
+    DISCARD,
+    RETURN,
+    SETUP_EVAL,
+    POP_EVAL,
+    BASE_CASE,
+    PRINT,
+    POP,
+    DEFINE,
+    FAIL,
+) = range(16)
+
+ARITHMETIC_FUNCTIONS = (
+    operator.add,
+    operator.sub,
+    operator.mul,
+    operator.floordiv,
+    operator.mod,
+)
+
+COMPARE_FUNCTIONS = {
+    OP_EQ: operator.eq,
+    OP_NE: operator.ne,
+    OP_GT: operator.gt,
+    OP_LT: operator.lt,
+    OP_GE: operator.ge,
+    OP_LE: operator.le,
+}
+
+# the errors a FAIL instruction can raise, by the name kept in its constant
+FAILURES = {"TypeError": TypeError, "RuntimeError": RuntimeError, "IndexError": IndexError}
+
+# how many calls (not counting the tail calls, which reuse their frame) the
+# VM nests before it gives up the way a too deep python recursion does
+MAX_FRAMES = 100000
+
+# a .lambdac file: a header, the marshal of the functions without their code,
+# and after it, aligned to 4 bytes, the code of all the functions as int32
+BYTECODE_MAGIC = b"LMBC"
+BYTECODE_VERSION = 1
+BYTECODE_HEADER = struct.Struct("<4sHBxI")  # magic, version, big endian?, metadata bytes
+
+
+class BytecodeFunction:
+    # name and params are "" and () for a top level statement. size is the
+    # number of slots of its frame, slots as resolve_slots() gives them
+    __slots__ = ("name", "params", "slots", "size", "code", "constants")
+
+    def __init__(self, name, params, slots, size, code, constants):
+        self.name = name
+        self.params = params
+        self.slots = slots
+        self.size = size
+        self.code = code
+        self.constants = constants
+
+    def __repr__(self):
+        return f"BytecodeFunction({self.name}, {list(self.params)}, {len(self.code) // 2} instructions)"
+
+
+class BytecodeProgram:
+    # statements holds the index in functions of every top level statement,
+    # in order. the other functions are the Defuns their DEFINE refers to
+    __slots__ = ("functions", "statements")
+
+    def __init__(self, functions, statements):
+        self.functions = functions
+        self.statements = statements
+
+
+class BytecodeCompiler:
+    def __init__(self):
+        self.functions = []
+        # what visit() raises for the nodes that can not be an operand, the
+        # closures run visit() for them
+        self.walker = Interpreter(compiled=False)
+
+    def compile_program(self, statements):
+        indexes = []
+        for statement in statements:
+            self.begin({})
+            self.evaluate(statement)
+            indexes.append(self.end("", ()))
+        return BytecodeProgram(self.functions, indexes)
+
+    def begin(self, scope):
+        self.code = array.array("i")
+        self.constants = []
+        self.constant_indexes = {}
+        self.scope = scope
+
+    def end(self, name, params, slots=None):
+        self.emit(RETURN)
+        self.functions.append(
+            BytecodeFunction(
+                name, tuple(params), slots, len(self.scope), self.code, tuple(self.constants)
+            )
+        )
+        return len(self.functions) - 1
+
+    def emit(self, instruction, argument=0):
+        # returns where the argument is, for patch()
+        self.code.append(instruction)
+        self.code.append(argument)
+        return len(self.code) - 1
+
+    def patch(self, position):
+        # points the jump at position to the next instruction
+        self.code[position] = len(self.code)
+
+    def constant(self, value):
+        # True == 1, so the class is part of the key
+        key = (value.__class__, value)
+        if key not in self.constant_indexes:
+            self.constant_indexes[key] = len(self.constants)
+            self.constants.append(value)
+        return self.constant_indexes[key]
+
+    def define(self, node):
+        layout, slots = resolve_slots(node.params)
+        outer = (self.code, self.constants, self.constant_indexes, self.scope)
+        self.begin(layout)
+        self.evaluate(node.body, tail=True)
+        index = self.end(node.name, node.params, slots)
+        self.code, self.constants, self.constant_indexes, self.scope = outer
+        self.emit(DEFINE, index)
+
+    def region(self, compile_node, node, *args):
+        # like the try of _compile_evaluate(): a type error raised in the
+        # region is printed and gives None instead
+        handler = self.emit(SETUP_EVAL)
+        compile_node(node, *args)
+        self.emit(POP_EVAL)
+        self.patch(handler)
+
+    def evaluate(self, node, tail=False):
+        # leaves the value of node on the stack, like _compile_evaluate()
+        if isinstance(node, (Num, Bool)):
+            self.expression(node)
+        elif isinstance(node, FuncDef):
+            self.define(node)
+        elif isinstance(node, FuncCall) and tail:
+            self.tail_call(node, discard=False)
+        elif isinstance(node, (BinOp, UnaryOp, LambdaExpr, FuncCall)):
+            self.region(self.expression, node)
+        elif isinstance(node, advancedFuncOp):
+            self.region(self.advanced, node, tail)
+        else:
+            self.emit(LOAD_CONST, self.constant(None))
+
+    def advanced(self, node, tail):
+        base_case = None
+        if isinstance(node.left, BinOp):
+            if isinstance(node.left.right, Var):
+                base_case = node.left.right.name
+            if isinstance(node.left.right, Num):
+                base_case = node.left.right.value
+        done = None
+        if base_case is not None:
+            self.emit(LOAD_CONST, self.constant(base_case))
+            done = self.emit(BASE_CASE)
+
+        if isinstance(node.right, FuncOp):
+            self.evaluate(node.right.right)
+            self.emit(PRINT)
+            if tail and isinstance(node.right.left, FuncCall):
+                self.tail_call(node.right.left, discard=True)
+            else:
+                self.evaluate(node.right.left)
+                self.emit(POP)
+                self.emit(LOAD_CONST, self.constant(None))
+        else:
+            self.evaluate(node.right, tail)
+
+        if done is not None:
+            self.patch(done)
+
+    def expression(self, node):
+        # leaves the value of node on the stack, like compile()
+        if isinstance(node, (Num, Bool)):
+            self.emit(LOAD_CONST, self.constant(node.value))
+        elif isinstance(node, Var):
+            if node.name in self.scope:
+                self.emit(LOAD_LOCAL, self.scope[node.name])
+            else:
+                self.emit(LOAD_CONST, self.constant(None))
+        elif isinstance(node, BinOp):
+            self.expression(node.left)
+            self.expression(node.right)
+            self.emit(BINARY, node.op)
+        elif isinstance(node, UnaryOp):
+            # like visit_UnaryOp the operand is evaluated without the local env
+            scope = self.scope
+            self.scope = {}
+            self.expression(node.expr)
+            self.scope = scope
+            self.emit(UNARY, node.op)
+        elif isinstance(node, LambdaExpr):
+            self.expression(node.body)
+        elif isinstance(node, FuncCall):
+            self.emit(CALL, self.call_frame(node))
+        else:
+            try:
+                self.walker.visit(node, {})
+            except (TypeError, RuntimeError) as e:
+                self.emit(FAIL, self.constant((type(e).__name__, str(e))))
+            else:
+                self.emit(LOAD_CONST, self.constant(None))
+
+    def call_frame(self, node):
+        # pushes the function, checked the way _compile_call_frame() checks
+        # it, then the arguments. returns the number of arguments
+        if node.args and isinstance(node.args[0], FuncOp):
+            self.emit(FUNCTION, self.constant((node.name, None)))
+            self.expression(node.args[0].left)
+            self.expression(node.args[0].right)
+            return 2
+        if not node.args:
+            self.emit(FUNCTION, self.constant((node.name, None)))
+            self.emit(FAIL, self.constant(("IndexError", "list index out of range")))
+            return 0
+        self.emit(FUNCTION, self.constant((node.name, len(node.args))))
+        for arg in node.args:
+            self.expression(arg)
+        return len(node.args)
+
+    def tail_call(self, node, discard):
+        # a type error raised by the arguments gives None, like
+        # _compile_tail_call()
+        handler = self.emit(SETUP_EVAL)
+        argc = self.call_frame(node)
+        self.emit(POP_EVAL)
+        if discard:
+            self.emit(DISCARD)
+        self.emit(TAIL_CALL, argc)
+        self.patch(handler)
+
+
+def compile_bytecode(statements):
+    return BytecodeCompiler().compile_program(statements)
+
+
+class VM:
+    # runs BytecodePrograms. global_env holds the BytecodeFunction of every
+    # Defun by name, which is also all the parser looks at
+    def __init__(self):
+        self.global_env = {}
+        self.functions = ()
+        self.max_tail_calls = MAX_TAIL_CALLS
+        self.max_frames = MAX_FRAMES
+
+    def interpret(self, statements):
+        return self.run(compile_bytecode(statements))
+
+    def run(self, program):
+        # the results of the statements, or None once a RuntimeError was printed
+        self.functions = program.functions
+        try:
+            return [
+                self.execute(program.functions[index], []) for index in program.statements
+            ]
+        except RuntimeError as e:
+            print(e)
+
+    def evaluate_statement(self, statement):
+        program = compile_bytecode([statement])
+        self.functions = program.functions
+        return self.execute(program.functions[program.statements[0]], [])
+
+    def execute(self, function, local_env):
+        global_env = self.global_env
+        frames = []
+        code = function.code
+        constants = function.constants
+        pc = 0
+        stack = []
+        # (handler, stack height) of the SETUP_EVAL regions the frame is in
+        regions = []
+        # a tail call made from a FuncOp sequence makes the frame return None
+        discard = False
+        jumps = 0
+
+        while True:
+            try:
+                while True:
+                    instruction = code[pc]
+                    argument = code[pc + 1]
+                    pc += 2
+
+                    if instruction == LOAD_LOCAL:
+                        stack.append(local_env[argument])
+                    elif instruction == LOAD_CONST:
+                        stack.append(constants[argument])
+                    elif instruction == BINARY:
+                        right = stack.pop()
+                        left = stack[-1]
+                        if argument <= OP_MOD:
+                            if left.__class__ is bool or right.__class__ is bool:
+                                raise TypeError("Type error")
+                            if argument >= OP_DIV and right == 0:
+                                if argument == OP_DIV:
+                                    raise RuntimeError("Division by zero")
+                                raise RuntimeError("Modulo by zero")
+                            stack[-1] = ARITHMETIC_FUNCTIONS[argument](left, right)
+                        elif argument <= OP_OR:
+                            if left.__class__ is not bool or right.__class__ is not bool:
+                                raise TypeError("one of the Operands is not bool")
+                            if argument == OP_AND:
+                                stack[-1] = left and right
+                            else:
+                                stack[-1] = left or right
+                        elif argument in COMPARE_FUNCTIONS:
+                            stack[-1] = COMPARE_FUNCTIONS[argument](left, right)
+                        else:
+                            raise TypeError("Type error")
+                    elif instruction == FUNCTION:
+                        name, argc = constants[argument]
+                        callee = global_env.get(name)
+                        if callee is None:
+                            raise RuntimeError(f"Function {name} is not defined")
+                        if argc is not None and argc != len(callee.params):
+                            raise RuntimeError(
+                                f"Function {name} expects {len(callee.params)} arguments, got {argc}"
+                            )
+                        stack.append(callee)
+                    elif instruction == CALL or instruction == TAIL_CALL:
+                        start = len(stack) - argument
+                        callee = stack[start - 1]
+                        if callee.slots is None and argument == len(callee.params):
+                            callee_env = stack[start:]
+                        else:
+                            callee_env = [None] * callee.size
+                            slots = callee.slots or range(len(callee.params))
+                            for i in range(argument):
+                                callee_env[slots[i]] = stack[start + i]
+                        del stack[start - 1 :]
+
+                        if instruction == CALL:
+                            if len(frames) >= self.max_frames:
+                                raise RecursionError("maximum recursion depth exceeded")
+                            frames.append(
+                                (code, constants, pc, stack, local_env, regions, discard, jumps)
+                            )
+                            stack = []
+                            discard = False
+                            jumps = 0
+                        else:
+                            jumps += 1
+                            if self.max_tail_calls is not None and jumps > self.max_tail_calls:
+                                raise RecursionError("maximum recursion depth exceeded")
+                            del stack[:]
+                        regions = []
+                        code = callee.code
+                        constants = callee.constants
+                        local_env = callee_env
+                        pc = 0
+                    elif instruction == RETURN:
+                        value = None if discard else stack.pop()
+                        if not frames:
+                            return value
+                        code, constants, pc, stack, local_env, regions, discard, jumps = frames.pop()
+                        stack.append(value)
+                    elif instruction == SETUP_EVAL:
+                        regions.append((argument, len(stack)))
+                    elif instruction == POP_EVAL:
+                        regions.pop()
+                    elif instruction == BASE_CASE:
+                        if stack.pop() == local_env[0]:
+                            stack.append(local_env[0])
+                            pc = argument
+                    elif instruction == UNARY:
+                        value = stack[-1]
+                        if argument != OP_NOT or value.__class__ is not bool:
+                            raise TypeError("Type error")
+                        stack[-1] = not value
+                    elif instruction == PRINT:
+                        print(stack.pop())
+                    elif instruction == POP:
+                        stack.pop()
+                    elif instruction == DISCARD:
+                        discard = True
+                    elif instruction == DEFINE:
+                        defined = self.functions[argument]
+                        global_env[defined.name] = defined
+                        stack.append("defined successfully")
+                    else:
+                        kind, message = constants[argument]
+                        raise FAILURES[kind](message)
+            except TypeError as e:
+                # the innermost region, in this frame or the frames calling it
+                while not regions:
+                    if not frames:
+                        raise
+                    code, constants, pc, stack, local_env, regions, discard, jumps = frames.pop()
+                pc, height = regions.pop()
+                print(e)
+                del stack[height:]
+                stack.append(None)
+
+
+def dump_bytecode(program, path):
+    # writes program as a .lambdac file
+    offsets = []
+    code = array.array("i")
+    for function in program.functions:
+        offsets.append(len(code))
+        code.extend(function.code)
+    metadata = marshal.dumps(
+        (
+            INTERPRETER_VERSION,
+            tuple(
+                (f.name, f.params, f.slots, f.size, offset, len(f.code), f.constants)
+                for f, offset in zip(program.functions, offsets)
+            ),
+            tuple(program.statements),
+        )
+    )
+    header = BYTECODE_HEADER.pack(
+        BYTECODE_MAGIC, BYTECODE_VERSION, sys.byteorder == "big", len(metadata)
+    )
+    padding = -(len(header) + len(metadata)) % code.itemsize
+    # a program loaded from the old file keeps running from its mapping,
+    # which a rewrite in place would change under it
+    temp = path + f".{os.getpid()}.tmp"
+    with open(temp, "wb") as file:
+        file.write(header)
+        file.write(metadata)
+        file.write(b"\0" * padding)
+        code.tofile(file)
+    os.replace(temp, path)
+
+
+def load_bytecode(path):
+    # the BytecodeProgram of a .lambdac file. the file is memory mapped and
+    # the code of the functions is read right from the mapping
+    with open(path, "rb") as file:
+        data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(data)
+    if len(view) < BYTECODE_HEADER.size:
+        raise ValueError(f"{path} is not a .lambdac file")
+    magic, version, big_endian, size = BYTECODE_HEADER.unpack_from(view)
+    if magic != BYTECODE_MAGIC:
+        raise ValueError(f"{path} is not a .lambdac file")
+    if version != BYTECODE_VERSION:
+        raise ValueError(f"{path} has bytecode version {version}, not {BYTECODE_VERSION}")
+
+    start = BYTECODE_HEADER.size
+    interpreter_version, functions, statements = marshal.loads(view[start : start + size])
+    if interpreter_version != INTERPRETER_VERSION:
+        raise ValueError(f"{path} was compiled by another interpreter version")
+    start += size
+    start += -start % 4
+    code = view[start:].cast("i")
+    if big_endian != (sys.byteorder == "big"):
+        code = array.array("i", code)
+        code.byteswap()
+
+    return BytecodeProgram(
+        [
+            BytecodeFunction(name, params, slots, size, code[offset : offset + length], constants)
+            for name, params, slots, size, offset, length, constants in functions
+        ],
+        list(statements),
+    )
+
+
+# PARALLEL EXECUTION
+# the statements of a file that are not Defuns are spread over worker
+# processes. every worker gets the definitions once, evaluates its share of the
+# statements with stdout captured, and the parent prints what they printed and
+# returns the results in the order of the file, like interpret() would.
+
+
+def called_names(node):
+    names = set()
+    nodes = [node]
+    while nodes:
+        node = nodes.pop()
+        if isinstance(node, list):
+            nodes.extend(node)
+        elif isinstance(node, (BinOp, FuncOp, advancedFuncOp)):
+            nodes.extend((node.left, node.right))
+        elif isinstance(node, UnaryOp):
+            nodes.append(node.expr)
+        elif isinstance(node, (LambdaExpr, FuncDef)):
+            nodes.append(node.body)
+        elif isinstance(node, FuncCall):
+            names.add(node.name)
+            if isinstance(node.args, list):
+                nodes.extend(node.args)
+    return names
+
+
+def independent_of_later_defuns(statements, global_env):
+    # True if no statement reaches (through the functions it calls) a
+    # function that is defined or redefined after it, so every Defun can be
+    # evaluated before the other statements without changing their results
+    bodies = {name: [entry[1]] for name, entry in global_env.items()}
+    for statement in statements:
+        if isinstance(statement, FuncDef):
+            bodies.setdefault(statement.name, []).append(statement.body)
+
+    defined_later = set()
+    for statement in reversed(statements):
+        if isinstance(statement, FuncDef):
+            defined_later.add(statement.name)
+            continue
+        reached = set()
+        names = called_names(statement)
+        while names:
+            name = names.pop()
+            if name in defined_later:
+                return False
+            if name not in reached:
+                reached.add(name)
+                for body in bodies.get(name, []):
+                    names |= called_names(body) - reached
+    return True
+
+
+# the interpreter of a worker process, built once by init_worker()
+worker_interpreter = None
+
+
+def init_worker(definitions, compiled, codegen, short_circuit, lazy, inline):
+    global worker_interpreter
+    worker_interpreter = Interpreter(
+        compiled=compiled,
+        codegen=codegen,
+        short_circuit=short_circuit,
+        lazy=lazy,
+        inline=inline,
+    )
+    for definition in load_program(definitions):
+        worker_interpreter.visit_FuncDef(definition)
+
+
+def run_chunk(chunk):
+    # (result, printed text, exception) of every statement of the chunk up to
+    # the first one that raised, as the statements after it would not run
+    outcomes = []
+    for statement in load_program(chunk):
+        output = io.StringIO()
+        error = None
+        result = None
+        with contextlib.redirect_stdout(output):
+            try:
+                result = worker_interpreter.evaluate_statement(statement)
+            except Exception as e:
+                error = e
+        outcomes.append((result, output.getvalue(), error))
+        if error is not None:
+            break
+    return outcomes
+
+
+def interpret_parallel(statements, interpreter, workers):
+    # interpreter.interpret(statements) with the statements spread over
+    # workers processes, it falls back to interpret() when a statement
+    # depends on a later Defun or there is nothing to spread
+    from concurrent.futures import ProcessPoolExecutor  # only needed here
+
+    calls = [i for i, statement in enumerate(statements) if not isinstance(statement, FuncDef)]
+    if (
+        workers < 2
+        or len(calls) < 2
+        or not independent_of_later_defuns(statements, interpreter.global_env)
+    ):
+        return interpreter.interpret(statements)
+
+    global_env = interpreter.global_env
+    before = dict(global_env)
+    results = [None] * len(statements)
+    for i, statement in enumerate(statements):
+        if isinstance(statement, FuncDef):
+            results[i] = interpreter.visit_FuncDef(statement)
+
+    # the workers rebuild the functions from their AST, the compiled bodies
+    # are closures that cannot be sent to another process
+    definitions = dump_program([
+        FuncDef(name, params, body) for name, (params, body, code, slots) in global_env.items()
+    ])
+    size = -(-len(calls) // (workers * 4))
+    chunks = [calls[i : i + size] for i in range(0, len(calls), size)]
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=init_worker,
+        initargs=(
+            definitions,
+            interpreter.compiled,
+            interpreter.codegen,
+            interpreter.short_circuit,
+            interpreter.lazy,
+            interpreter.inline,
+        ),
+    ) as pool:
+        outcomes = pool.map(
+            run_chunk, [dump_program([statements[i] for i in chunk]) for chunk in chunks]
+        )
+        for chunk, chunk_outcomes in zip(chunks, outcomes):
+            for i, (result, output, error) in zip(chunk, chunk_outcomes):
+                sys.stdout.write(output)
+                if error is None:
+                    results[i] = result
+                    continue
+
+                # the Defuns after the failed statement would not have run
+                pool.shutdown(cancel_futures=True)
+                global_env.clear()
+                global_env.update(before)
+                for valid, body, nodes, reached in interpreter.inlined.values():
+                    valid[0] = False
+                interpreter.inlined.clear()
+                for statement in statements[:i]:
+                    if isinstance(statement, FuncDef):
+                        interpreter.visit_FuncDef(statement)
+                if isinstance(error, RuntimeError):
+                    print(error)
+                    return None
+                raise error
+    return results
+
+
+# STREAMING
+# a file is split on the ; that are outside of any parenthesis while it is
+# read, and every statement is evaluated as soon as it is complete
+
+
+STATEMENT_PUNCTUATION = re.compile(r"[(){};]")
+
+
+def read_statements(file, chunk_size=STREAM_CHUNK_SIZE):
+    # yields the text of every statement of an open file with its ; included
+    depth = 0
+    pending = []
+    while True:
+        chunk = file.read(chunk_size)
+        if not chunk:
+            break
+        start = 0
+        for match in STATEMENT_PUNCTUATION.finditer(chunk):
+            char = match.group()
+            if char in "({":
+                depth += 1
+            elif char in ")}":
+                depth = max(depth - 1, 0)
+            elif depth == 0:
+                pending.append(chunk[start : match.end()])
+                yield "".join(pending)
+                pending = []
+                start = match.end()
+        pending.append(chunk[start:])
+
+    rest = "".join(pending)
+    if rest.strip():
+        yield rest
+
+
+def stream_program(file, interpreter, optimizer=None):
+    # evaluates the statements of an open .lambda file one by one while it is
+    # read and yields their results. a statement is lexed and parsed the way
+    # it is as part of the whole file: without operator precedence once the
+    # file has a ;, and knowing only the functions defined before the file
+    # (a call in an expression needs its function defined beforehand).
+    # like interpret() a RuntimeError is printed and ends the program
+    known = Interpreter()
+    known.global_env = dict.fromkeys(interpreter.global_env)
+    separated = False
+    for text in read_statements(file):
+        if separated and not text.endswith(";"):
+            text += ";"
+        separated = True
+
+        statements = Parser(Lexer(text), known).parse()
+        if optimizer is not None:
+            statements = optimizer.optimize(statements)
+        for statement in statements:
+            try:
+                result = interpreter.evaluate_statement(statement)
+            except RuntimeError as e:
+                print(e)
+                return
+            yield result
+
+
+# INTERACTIVE SESSION
+# the state of the interactive mode between lines: one interpreter and one
+# optimizer, so every line is parsed against the functions the lines before it
+# defined. a Defun typed again unchanged keeps its compiled code and memo
+# table, a changed one only empties the memo tables of the functions that call
+# it (see Interpreter.visit_FuncDef). besides lines of code it takes
+#   :time        prints how long every line took to parse and to run (again
+#                to switch it off)
+#   :deps NAME   prints the functions that call NAME
+
+
+class Session:
+    def __init__(self, interpreter, optimizer):
+        self.interpreter = interpreter
+        self.optimizer = optimizer
+        self.timing = False
+
+    def run(self, text):
+        # runs one line and prints its results like the interactive mode
+        # always did. returns the results, None after an error or a command
+        command = text.split()
+        if command and command[0] == ":time":
+            self.timing = not self.timing
+            print(f"timing {'on' if self.timing else 'off'}")
+            return None
+        if command and command[0] == ":deps":
+            for name in command[1:]:
+                print(f"{name}: {', '.join(sorted(self.interpreter.dependents(name))) or '-'}")
+            return None
+
+        start = time.perf_counter()
+        statements = self.optimizer.optimize(Parser(Lexer(text), self.interpreter).parse())
+        parsed = time.perf_counter()
+        result = self.interpreter.interpret(statements)
+        finished = time.perf_counter()
+        if result is not None and result[0] is not None:
+            for x in result:
+                print(x)
+        if self.timing:
+            print(
+                f"(parse {(parsed - start) * 1000:.3f} ms, run {(finished - parsed) * 1000:.3f} ms)"
+            )
+        return result
+
+
 # MMMMMMMM               MMMMMMMM               AAA               IIIIIIIIIINNNNNNNN        NNNNNNNN
 # M:::::::M             M:::::::M              A:::A              I::::::::IN:::::::N       N::::::N
 # M::::::::M           M::::::::M             A:::::A             I::::::::IN::::::::N      N::::::N
@@ -1059,8 +3972,350 @@ class Interpreter:
 # MMMMMMMM               MMMMMMMMAAAAAAA                   AAAAAAAIIIIIIIIIINNNNNNNN         NNNNNNN
 
 
-def main():
+# the statements of the test suite, by part, and the results of the ones
+# that return a result, in order. benchmarks.py times the same statements
+TEST_PARTS = [
+    [
+        "Defun (AddAplusAMulB,a,b)a + lambd (b,a) (b*a)",
+        "AddAplusAMulB(4,2)",
+        "Defun (AddAplusAMulBplusBMinusA,a,b)a + lambd (b,a) (b*a) + lambd (b,a) (b-a)",
+        "AddAplusAMulBplusBMinusA(5,8)"
+    ],
+    [
+        "Defun (boolTrue,a)True",
+        "boolTrue(0)&&True",
+        "True&&boolTrue(0)",
+        "Defun (Add,a,b)a+b",
+        "Add(2,1)",
+        "Add(2,1)-8",
+        "8-Add(2,1)",
+        "Add(Add(2,2),2)",
+        "Add(2,Add(2,2))",
+        "2-Add(Add(2,2),2)",
+        "Add(Add(2,2),2) - 2",
+        "2-Add(2,Add(2,2))",
+        "Add(2,Add(2,2)) - 2",
+        "Defun (Factorial, n)(n == 1) or (n * Factorial(n - 1))",
+        "Factorial(4)",
+        "-30/6*5-2",
+        "Add(2,1)==3",
+        "3==Add(2,1)",
+        "Add(2,1)!=3",
+        "3!=Add(2,1)",
+        "(Add(2,1)==3)",
+        "(3==Add(2,1))",
+        "(Add(2,1)==3)||(Add(2,1)==3)",
+        "(Add(2,1)==3)||(Add(2,1)==4)",
+        "(Add(2,1)==4)||(Add(2,1)==4)",
+        "(Add(2,1)==3)&&(Add(2,1)==3)",
+        "(Add(2,1)==3)&&(Add(2,1)==4)",
+        "(Add(2,1)==4)&&(Add(2,1)==4)",
+        "not True",
+        "not False"
+    ],
+    [
+        "Defun (Add,a,b)a+b",
+        "Defun (repeat,n)(n==0) or (repeat(n-1) , Add(1,1))",
+        "repeat(5)"
+    ],
+    [
+        "Add((2,2)",
+        "jibrish",
+        "repeat())",
+        "repeat()",
+        "repeat(5)0",
+        "Deun (Add,a,b) a+b",
+        "Defun (Add,a,b)",
+        "Defun (Add,a,b+2)",
+        "true",
+        "false"
+    ],
+    [
+        "not 1",
+        "not -1",
+        "Add(2,True)",
+        "Add(True,2)",
+        "1+True",
+        "True+1",
+        "1+False",
+        "False+1",
+        "Add(2,1)&&3",
+        "3&&Add(2,1)",
+        "Add(2,1)||3",
+        "3||Add(2,1)"
+    ],
+    [
+        "repeat(-1)",
+        "Factorial(-1)",
+        "2/0",
+        "4%0"
+    ],
+]
+
+TEST_OUTPUTS = [
+        "defined successfully",
+        12,
+        "defined successfully",
+        48,
+
+        "defined successfully",
+        True,
+        True,
+        "defined successfully",
+        3,
+        -5,
+        5,
+        6,
+        6,
+        -4,
+        4,
+        -4,
+        4,
+        "defined successfully",
+        24,
+        -27,
+        True,
+        True,
+        False,
+        False,
+        True,
+        True,
+        True,
+        True,
+        False,
+        True,
+        False,
+        False,
+        False,
+        True,
+
+        "defined successfully",
+        "defined successfully"
+]
+
+
+# the cap on calls in tail position the test suite runs with: repeat(-1) of
+# part 6 never ends, and is meant to fail like a too deep recursion does
+TEST_TAIL_CALLS = 1000
+
+
+def run_text(text, interpreter, optimizer, cache=None, workers=1):
+    # runs a whole program and prints its results, the way the file loader
+    # does. returns False if an error was printed instead
+    try:
+        statements = optimizer.optimize(parse_program(text, interpreter, cache))
+        # a large file has its calls spread over the workers
+        if workers > 1 and len(statements) >= PARALLEL_MIN_STATEMENTS:
+            result = interpret_parallel(statements, interpreter, workers)
+        else:
+            result = interpreter.interpret(statements)
+        if result[0] is not None:
+            for x in result:
+                print(x)
+        return True
+    except Exception as e:
+        if not isinstance(e, TypeError):
+            print(e)
+        return False
+
+
+def run_stream(file, interpreter, optimizer):
+    # prints the results of an open file while it runs, and like run_text()
+    # nothing when the first result is None
+    try:
+        results = stream_program(file, interpreter, optimizer)
+        first = next(results, None)
+        if first is not None:
+            print(first)
+        for x in results:
+            if first is not None:
+                print(x)
+        return True
+    except Exception as e:
+        if not isinstance(e, TypeError):
+            print(e)
+        return False
+
+
+def run_bytecode(filename, vm):
+    # runs a .lambdac file on the VM and prints its results like run_text()
+    try:
+        result = vm.run(load_bytecode(filename))
+        if result[0] is not None:
+            for x in result:
+                print(x)
+        return True
+    except Exception as e:
+        if not isinstance(e, TypeError):
+            print(e)
+        return False
+
+
+def compile_file(filename, vm, optimizer):
+    # writes the bytecode of a .lambda file next to it, as a .lambdac file.
+    # only the Defuns of the file then run on vm, so the files after it parse
+    # against its functions like they do when the files run one after another
+    try:
+        with open(filename, "r") as file:
+            statements = optimizer.optimize(Parser(Lexer(file.read()), vm).parse())
+        dump_bytecode(compile_bytecode(statements), filename + "c")
+        vm.run(compile_bytecode([s for s in statements if isinstance(s, FuncDef)]))
+        return True
+    except Exception as e:
+        print(f"{filename}: {e}")
+        return False
+
+
+def cli(argv):
+    # the command line without any prompts, eg:
+    #   python interpreterProj.py lib.lambda -e "Factorial(5)"
+    #   echo "Add(1,2)" | python interpreterProj.py lib.lambda -
+    #   python interpreterProj.py --compile lib.lambda && python interpreterProj.py lib.lambdac
+    arg_parser = argparse.ArgumentParser(
+        prog="interpreterProj.py",
+        description="runs .lambda files, then the -e expressions, with one "
+        "interpreter so later inputs can call the functions of earlier ones",
+    )
+    arg_parser.add_argument(
+        "files", nargs="*", metavar="FILE",
+        help="a .lambda or .lambdac file, or - to read stdin",
+    )
+    arg_parser.add_argument(
+        "-e", dest="expressions", action="append", default=[], metavar="EXPR",
+        help="a program given on the command line",
+    )
+    arg_parser.add_argument(
+        "--stream", action="store_true",
+        help="run every file statement by statement while it is read",
+    )
+    arg_parser.add_argument(
+        "--workers", type=int, default=1,
+        help="worker processes for the calls of large files",
+    )
+    arg_parser.add_argument("--memoize", action="store_true", help="memoize every Defun")
+    arg_parser.add_argument(
+        "--codegen", action="store_true",
+        help="translate the Defuns that allow it into python functions",
+    )
+    arg_parser.add_argument(
+        "--short-circuit", action="store_true",
+        help="evaluate the right operand of && and || only if the left one does not decide",
+    )
+    arg_parser.add_argument(
+        "--lazy", action="store_true",
+        help="evaluate the arguments of a call only when the body reads them",
+    )
+    arg_parser.add_argument(
+        "--no-inline", action="store_true",
+        help="call every Defun instead of inlining the small non-recursive ones",
+    )
+    arg_parser.add_argument(
+        "--vm", action="store_true",
+        help="run on the bytecode VM, which a .lambdac file always runs on",
+    )
+    arg_parser.add_argument(
+        "--compile", action="store_true",
+        help="write every .lambda file as a .lambdac file instead of running it",
+    )
+    arg_parser.add_argument(
+        "--no-cache", action="store_true", help="do not cache parsed files"
+    )
+    arg_parser.add_argument(
+        "--node-counts", action="store_true",
+        help="print the node count of every program before and after optimizing",
+    )
+    arg_parser.add_argument(
+        "--type-checks", action="store_true",
+        help="print how many operand type checks type inference left out to stderr at the end",
+    )
+    arg_parser.add_argument(
+        "--profile", choices=["table", "json", "collapsed"],
+        help="print a profile of the functions and operators to stderr at the end",
+    )
+    args = arg_parser.parse_intermixed_args(argv)
+
+    profiler = None if args.profile is None else Profiler()
+    optimizer = Optimizer(verbose=args.node_counts)
+    cache = None if args.no_cache else ProgramCache()
+    ok = True
+
+    if args.compile:
+        vm = VM()
+        for filename in args.files:
+            if not filename.endswith(".lambda"):
+                print("Error: The file must have a .lambda suffix.")
+                ok = False
+            else:
+                ok = compile_file(filename, vm, optimizer) and ok
+        return 0 if ok else 1
+
+    if args.vm or any(filename.endswith(".lambdac") for filename in args.files):
+        # the VM runs the calls itself, in one process
+        interpreter = VM()
+        args.workers = 1
+    else:
+        interpreter = Interpreter(
+            memoize=args.memoize,
+            profiler=profiler,
+            codegen=args.codegen,
+            short_circuit=args.short_circuit,
+            lazy=args.lazy,
+            inline=0 if args.no_inline else INLINE_NODES,
+        )
+
+    for filename in args.files:
+        if filename == "-":
+            if args.stream:
+                ok = run_stream(sys.stdin, interpreter, optimizer) and ok
+            else:
+                ok = run_text(sys.stdin.read(), interpreter, optimizer, cache, args.workers) and ok
+            continue
+
+        if filename.endswith(".lambdac"):
+            if not os.path.exists(filename):
+                print(f"Error: The file '{filename}' was not found.")
+                ok = False
+            else:
+                ok = run_bytecode(filename, interpreter) and ok
+            continue
+        if not filename.endswith(".lambda"):
+            print("Error: The file must have a .lambda suffix.")
+            ok = False
+            continue
+        try:
+            with open(filename, "r") as file:
+                if args.stream or os.path.getsize(filename) > STREAM_MIN_BYTES:
+                    ok = run_stream(file, interpreter, optimizer) and ok
+                else:
+                    text = file.read()
+                    ok = run_text(text, interpreter, optimizer, cache, args.workers) and ok
+        except FileNotFoundError:
+            print(f"Error: The file '{filename}' was not found.")
+            ok = False
+
+    for text in args.expressions:
+        ok = run_text(text, interpreter, optimizer) and ok
+
+    if args.type_checks and isinstance(interpreter, Interpreter):
+        print(f"type checks eliminated: {interpreter.checks_eliminated}", file=sys.stderr)
+    if args.profile == "table":
+        print(profiler.table(), file=sys.stderr)
+    elif args.profile == "json":
+        print(profiler.to_json(), file=sys.stderr)
+    elif args.profile == "collapsed":
+        print(profiler.collapsed(), file=sys.stderr)
+    return 0 if ok else 1
+
+
+def main(argv=None):
+    # with arguments the program runs without any prompt, see cli()
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv:
+        return cli(argv)
+
     interpreter = Interpreter()
+    optimizer = Optimizer()
     print("would you like to initiate the interactive mode?")
     print("enter Y in order to activate it or enter N to access the options of:\n1) loading code from a lambda file\n2) activating the test suite")
     answer = input(">>> ")
@@ -1072,134 +4327,27 @@ def main():
         answer = input(">>> ")
         if answer == "Y":
             print("part 1: lambda statements: 4 statements to check")
-            part1 = [
-                "Defun (AddAplusAMulB,a,b)a + lambd (b,a) (b*a)",
-                "AddAplusAMulB(4,2)",
-                "Defun (AddAplusAMulBplusBMinusA,a,b)a + lambd (b,a) (b*a) + lambd (b,a) (b-a)",
-                "AddAplusAMulBplusBMinusA(5,8)"
-            ]
+            part1 = TEST_PARTS[0]
 
             print("part 2: functional programming statements: 30 statements to check")
-            part2 = [
-                "Defun (boolTrue,a)True",
-                "boolTrue(0)&&True",
-                "True&&boolTrue(0)",
-                "Defun (Add,a,b)a+b",
-                "Add(2,1)",
-                "Add(2,1)-8",
-                "8-Add(2,1)",
-                "Add(Add(2,2),2)",
-                "Add(2,Add(2,2))",
-                "2-Add(Add(2,2),2)",
-                "Add(Add(2,2),2) - 2",
-                "2-Add(2,Add(2,2))",
-                "Add(2,Add(2,2)) - 2",
-                "Defun (Factorial, n)(n == 1) or (n * Factorial(n - 1))",
-                "Factorial(4)",
-                "-30/6*5-2",
-                "Add(2,1)==3",
-                "3==Add(2,1)",
-                "Add(2,1)!=3",
-                "3!=Add(2,1)",
-                "(Add(2,1)==3)",
-                "(3==Add(2,1))",
-                "(Add(2,1)==3)||(Add(2,1)==3)",
-                "(Add(2,1)==3)||(Add(2,1)==4)",
-                "(Add(2,1)==4)||(Add(2,1)==4)",
-                "(Add(2,1)==3)&&(Add(2,1)==3)",
-                "(Add(2,1)==3)&&(Add(2,1)==4)",
-                "(Add(2,1)==4)&&(Add(2,1)==4)",
-                "not True",
-                "not False"
-            ]
+            part2 = TEST_PARTS[1]
 
             print("part 3: while loop statements: 2 statements to check")
-            part3 = [
-                "Defun (Add,a,b)a+b",
-                "Defun (repeat,n)(n==0) or (repeat(n-1) , Add(1,1))",
-                "repeat(5)"
-            ]
+            part3 = TEST_PARTS[2]
             
             print("part 4: syntax errors statements: 10 statements to check")
-            part4 = [
-                "Add((2,2)",
-                "jibrish",
-                "repeat())",
-                "repeat()",
-                "repeat(5)0",
-                "Deun (Add,a,b) a+b",
-                "Defun (Add,a,b)",
-                "Defun (Add,a,b+2)",
-                "true",
-                "false"
-            ]
+            part4 = TEST_PARTS[3]
             
             print("part 5: type errors statements: 13 statements to check")
-            part5 = [
-                "not 1",
-                "not -1",
-                "Add(2,True)",
-                "Add(True,2)",
-                "1+True",
-                "True+1",
-                "1+False",
-                "False+1",
-                "Add(2,1)&&3",
-                "3&&Add(2,1)",
-                "Add(2,1)||3",
-                "3||Add(2,1)"
-            ]
+            part5 = TEST_PARTS[4]
             
             print("part 6: runtime errors statements: 7 statements to check")
-            part6 = [
-                "repeat(-1)",
-                "Factorial(-1)",
-                "2/0",
-                "4%0"
-            ]
+            part6 = TEST_PARTS[5]
 
             allParts = [part1 ,part2 ,part3 ,part4 ,part5, part6]
 
-            allPartsOutPut = [
-                "defined successfully",
-                12,
-                "defined successfully",
-                48,
-                
-                "defined successfully",
-                True,
-                True,
-                "defined successfully",
-                3,
-                -5,
-                5,
-                6,
-                6,
-                -4,
-                4,
-                -4,
-                4,
-                "defined successfully",
-                24,
-                -27,
-                True,
-                True,
-                False,
-                False,
-                True,
-                True,
-                True,
-                True,
-                False,
-                True,
-                False,
-                False,
-                False,
-                True,
-                
-                "defined successfully",
-                "defined successfully"
-            ]
+            allPartsOutPut = TEST_OUTPUTS
+            interpreter.max_tail_calls = TEST_TAIL_CALLS
             
             i = 1
             c = 0
@@ -1238,33 +4386,20 @@ def main():
             # Read the file content
             try:
                 with open(filename, "r") as file:
+                    if os.path.getsize(filename) > STREAM_MIN_BYTES:
+                        run_stream(file, interpreter, optimizer)
+                        return
                     text = file.read()
             except FileNotFoundError:
                 print(f"Error: The file '{filename}' was not found.")
                 return
-            try:
-                # Process the content as a single input
-                lexer = Lexer(text)
-                parser = Parser(lexer, interpreter)
-                statements = parser.parse()
-                result = interpreter.interpret(statements)
-                if result[0] is not None:
-                    for x in result:
-                        print(x)
-            except Exception as e:
-                if not isinstance(e, TypeError):
-                    print(e)
+            # Process the content as a single input
+            run_text(text, interpreter, optimizer)
     elif answer == "Y":
+        session = Session(interpreter, optimizer)
         while True:
             try:
-                text = input(">>> ")
-                lexer = Lexer(text)
-                parser = Parser(lexer, interpreter)
-                statements = parser.parse()
-                result = interpreter.interpret(statements)
-                if result[0] is not None:
-                    for x in result:
-                        print(x)
+                session.run(input(">>> "))
             except Exception as e:
                 if isinstance(e, EOFError):
                     break
@@ -1275,4 +4410,5 @@ def main():
 
 
 # execute main
-main()
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,191 @@
+
+# a long running interpreter that keeps its functions defined and compiled
+# between requests, eg:
+#   python server.py --socket /tmp/lambda.sock --load lib.lambda
+#   python server.py --stdio
+# every request is one line of JSON like {"id": 1, "program": "Add(1,2)"} with
+# an optional "timeout" (seconds), "max_steps" and "max_depth", and every
+# response is one line like {"id": 1, "results": [3], "output": ""}. results is
+# None when the program printed an error, output holds everything the program
+# printed. a program stopped by one of the limits also gets a "budget" with how
+# far it got, eg: {"limit": "step", "steps": 1001, "depth": 3, "deepest": 9,
+# "elapsed": 0.002}. without --timeout and --max-steps a request gets
+# DEFAULT_TIMEOUT and DEFAULT_MAX_STEPS, so no request can hold the server
+
+# imports
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import signal
+import sys
+
+from interpreterProj import BudgetExceeded, Interpreter, Lexer, Optimizer, Parser
+
+# the longest request line a socket client may send
+MAX_REQUEST_BYTES = 16 * 1024 * 1024
+
+# the limits of a request when the server is started without any
+DEFAULT_TIMEOUT = 10.0
+DEFAULT_MAX_STEPS = 10000000
+
+
+def tighter(requested, cap):
+    if requested is None:
+        return cap
+    if cap is None:
+        return requested
+    return min(requested, cap)
+
+
+class Server:
+    # timeout, max_steps and max_depth are the largest limits a request may
+    # ask for, and the limits of a request that asks for none
+    def __init__(self, timeout=DEFAULT_TIMEOUT, max_steps=DEFAULT_MAX_STEPS, max_depth=None):
+        self.interpreter = Interpreter()
+        self.optimizer = Optimizer()
+        self.timeout = timeout
+        self.max_steps = max_steps
+        self.max_depth = max_depth
+        # taken by the request running on the shared interpreter
+        self.lock = None
+
+    def evaluate(self, program, timeout=None, max_steps=None, max_depth=None):
+        # (results, printed text, budget stats or None) of a program run on the
+        # shared interpreter, so its Defuns stay defined for the requests after it
+        output = io.StringIO()
+        results = None
+        budget = None
+        with contextlib.redirect_stdout(output):
+            try:
+                statements = Parser(Lexer(program), self.interpreter).parse()
+                self.interpreter.set_limits(max_steps, timeout, max_depth)
+                results = self.interpreter.interpret(self.optimizer.optimize(statements))
+            except BudgetExceeded as e:
+                print(e)
+                budget = e.stats()
+            except Exception as e:
+                print(e)
+            finally:
+                self.interpreter.set_limits()
+        return results, output.getvalue(), budget
+
+    def answer(self, line):
+        # the response line to a request line
+        request = {}
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                request = {}
+                raise ValueError("a request is a JSON object")
+            if not isinstance(request.get("program"), str):
+                raise ValueError("a request needs a program")
+            for limit in ("timeout", "max_steps", "max_depth"):
+                value = request.get(limit)
+                if value is not None and (
+                    value.__class__ is bool or not isinstance(value, (int, float))
+                ):
+                    raise ValueError(f"{limit} must be a number")
+        except ValueError as e:  # json.JSONDecodeError is a ValueError too
+            return json.dumps(
+                {"id": request.get("id"), "results": None, "output": f"bad request: {e}\n"}
+            )
+
+        results, output, budget = self.evaluate(
+            request["program"],
+            tighter(request.get("timeout"), self.timeout),
+            tighter(request.get("max_steps"), self.max_steps),
+            tighter(request.get("max_depth"), self.max_depth),
+        )
+        response = {"id": request.get("id"), "results": results, "output": output}
+        if budget is not None:
+            response["budget"] = budget
+        return json.dumps(response)
+
+    # a request is evaluated in a thread of the executor, so the event loop
+    # keeps reading the other clients while it runs. the clients share one
+    # interpreter, so their requests wait for the lock and run one at a time
+    # in the order they came
+    async def handle(self, reader, writer):
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if line.strip():
+                    async with self.lock:
+                        response = await loop.run_in_executor(None, self.answer, line.decode())
+                    writer.write(response.encode() + b"\n")
+                    await writer.drain()
+        finally:
+            writer.close()
+
+    async def serve_socket(self, path):
+        self.lock = asyncio.Lock()
+        if os.path.exists(path):
+            os.unlink(path)
+        server = await asyncio.start_unix_server(
+            self.handle, path=path, limit=MAX_REQUEST_BYTES
+        )
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            if os.path.exists(path):
+                os.unlink(path)
+
+    def serve_stdio(self):
+        # one client, so no event loop is needed
+        for line in sys.stdin:
+            if line.strip():
+                sys.stdout.write(self.answer(line) + "\n")
+                sys.stdout.flush()
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="interpreter server")
+    where = arg_parser.add_mutually_exclusive_group(required=True)
+    where.add_argument("--socket", metavar="PATH", help="listen on a unix socket")
+    where.add_argument(
+        "--stdio", action="store_true", help="read requests from stdin, answer on stdout"
+    )
+    arg_parser.add_argument(
+        "--load", action="append", default=[], metavar="FILE",
+        help="a .lambda file to run before the first request",
+    )
+    arg_parser.add_argument(
+        "--timeout", type=float, default=DEFAULT_TIMEOUT, help="seconds a request may run"
+    )
+    arg_parser.add_argument(
+        "--max-steps", type=int, default=DEFAULT_MAX_STEPS, help="calls a request may make"
+    )
+    arg_parser.add_argument(
+        "--max-depth", type=int, help="nested calls a request may make"
+    )
+    args = arg_parser.parse_args()
+
+    server = Server(args.timeout, args.max_steps, args.max_depth)
+    for filename in args.load:
+        with open(filename, "r") as file:
+            results, output, budget = server.evaluate(file.read())
+        if results is None:
+            sys.stderr.write(f"{filename}: {output}")
+            return 1
+
+    if args.stdio:
+        server.serve_stdio()
+    else:
+        # a terminated server still removes its socket file
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+        try:
+            asyncio.run(server.serve_socket(args.socket))
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,296 @@
+# tests of the interpreter, run from src with: python -m unittest (or pytest)
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import interpreterProj
+from interpreterProj import (
+    TEST_OUTPUTS,
+    TEST_PARTS,
+    TEST_TAIL_CALLS,
+    BudgetExceeded,
+    Interpreter,
+    Lexer,
+    Optimizer,
+    Parser,
+    ProgramCache,
+    VM,
+    compile_bytecode,
+    compile_file,
+    dump_bytecode,
+    load_bytecode,
+    parse_program,
+)
+
+# every mode a program can run in, by name. None is the bytecode VM
+MODES = {
+    "closures": {},
+    "walker": {"compiled": False},
+    "memoize": {"memoize": True},
+    "codegen": {"codegen": True},
+    "lazy": {"lazy": True},
+    "short_circuit": {"short_circuit": True},
+    "inline=0": {"inline": 0},
+    "vm": None,
+}
+
+# the modes that run a call in tail position on a trampoline, the tree walker
+# recurses in python instead
+TRAMPOLINE_MODES = [mode for mode in MODES if mode != "walker"]
+
+# a loop of n calls in tail position, f(n) is 0
+LOOP = "Defun (f,n)(n==0) or (f(n-1))"
+
+
+def make(mode):
+    options = MODES[mode]
+    return VM() if options is None else Interpreter(**options)
+
+
+def run(interpreter, texts):
+    # (results, printed text) of the texts run one after another, the way the
+    # test suite of main() runs its statements
+    results = []
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        for text in texts:
+            try:
+                result = interpreter.interpret(Parser(Lexer(text), interpreter).parse())
+                if result[0] is not None:
+                    results.extend(result)
+            except Exception as e:
+                if not isinstance(e, TypeError):
+                    print(e)
+    return results, out.getvalue()
+
+
+class SuiteTest(unittest.TestCase):
+    def run_suite(self, mode):
+        interpreter = make(mode)
+        interpreter.max_tail_calls = TEST_TAIL_CALLS
+        return run(interpreter, [text for part in TEST_PARTS for text in part])
+
+    def test_every_mode_passes_the_suite(self):
+        for mode in MODES:
+            with self.subTest(mode=mode):
+                results, printed = self.run_suite(mode)
+                self.assertEqual(results, TEST_OUTPUTS)
+                # True == 1, the suite compares bools by identity
+                self.assertEqual(list(map(type, results)), list(map(type, TEST_OUTPUTS)))
+                self.assertTrue(printed.startswith("2\n" * 5 + "Syntax error\n"))
+                self.assertTrue(printed.endswith("Division by zero\nModulo by zero\n"))
+
+    def test_trampoline_modes_print_the_same(self):
+        # the walker ends repeat(-1) at the python recursion limit instead
+        _, expected = self.run_suite("closures")
+        for mode in TRAMPOLINE_MODES:
+            with self.subTest(mode=mode):
+                self.assertEqual(self.run_suite(mode)[1], expected)
+
+
+class TailCallTest(unittest.TestCase):
+    def make_limited(self):
+        interpreter = Interpreter()
+        interpreter.set_limits(max_steps=10**6)
+        return interpreter
+
+    def test_loops_are_not_capped_by_default(self):
+        for mode in TRAMPOLINE_MODES:
+            with self.subTest(mode=mode):
+                self.assertEqual(run(make(mode), [LOOP, "f(50000)"])[0], ["defined successfully", 0])
+
+    def test_cap_allows_exactly_max_tail_calls_jumps(self):
+        # limited runs the trampoline that takes steps, the statement f(n)
+        # itself is a plain call and only its n jumps count
+        for mode in TRAMPOLINE_MODES + ["limited"]:
+            for text, results, printed in (
+                ("f(50)", [0], ""),
+                ("f(51)", [], "maximum recursion depth exceeded\n"),
+            ):
+                with self.subTest(mode=mode, text=text):
+                    # a fresh interpreter, memoize would look f(50) up for f(51)
+                    interpreter = self.make_limited() if mode == "limited" else make(mode)
+                    interpreter.max_tail_calls = 50
+                    self.assertEqual(
+                        run(interpreter, [LOOP, text]), (["defined successfully"] + results, printed)
+                    )
+
+    def test_runaway_loop_is_stopped_by_limits(self):
+        interpreter = Interpreter()
+        run(interpreter, TEST_PARTS[2])
+        interpreter.set_limits(max_steps=1000)
+        with contextlib.redirect_stdout(io.StringIO()):
+            with self.assertRaises(BudgetExceeded) as raised:
+                interpreter.interpret(Parser(Lexer("repeat(-1)"), interpreter).parse())
+        self.assertEqual(raised.exception.limit, "step")
+
+
+class LimitsTest(unittest.TestCase):
+    def setUp(self):
+        self.interpreter = Interpreter()
+        run(self.interpreter, [LOOP, "Defun (Sum,n)(n==0) or (n + Sum(n-1))"])
+
+    def evaluate(self, text):
+        return self.interpreter.interpret(Parser(Lexer(text), self.interpreter).parse())
+
+    def test_step_limit(self):
+        self.interpreter.set_limits(max_steps=100)
+        self.assertEqual(self.evaluate("f(50)"), [0])
+        self.interpreter.set_limits(max_steps=100)
+        with self.assertRaises(BudgetExceeded) as raised:
+            self.evaluate("f(500)")
+        stats = raised.exception.stats()
+        self.assertEqual(stats["limit"], "step")
+        self.assertEqual(stats["steps"], 101)
+
+    def test_depth_limit(self):
+        self.interpreter.set_limits(max_depth=50)
+        self.assertEqual(self.evaluate("Sum(20)"), [210])
+        # calls in tail position do not nest
+        self.assertEqual(self.evaluate("f(500)"), [0])
+        with self.assertRaises(BudgetExceeded) as raised:
+            self.evaluate("Sum(100)")
+        self.assertEqual(raised.exception.limit, "call depth")
+        self.assertGreater(raised.exception.deepest, 50)
+
+    def test_timeout(self):
+        run(self.interpreter, ["Defun (spin,n)(n==0) or (spin(n+1))"])
+        self.interpreter.set_limits(timeout=0.05)
+        with self.assertRaises(BudgetExceeded) as raised:
+            self.evaluate("spin(1)")
+        self.assertEqual(raised.exception.limit, "time")
+        self.assertGreaterEqual(raised.exception.elapsed, 0.05)
+
+    def test_set_limits_without_arguments_lifts_them(self):
+        self.interpreter.set_limits(max_steps=10)
+        self.interpreter.set_limits()
+        self.assertEqual(self.evaluate("f(5000)"), [0])
+
+
+class ProgramCacheTest(unittest.TestCase):
+    TEXT = "Defun (Add,a,b)a+b; Add(1,2)"
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cache = ProgramCache(directory.name)
+
+    def test_unchanged_text_is_not_parsed_again(self):
+        statements = parse_program(self.TEXT, Interpreter(), self.cache)
+        with mock.patch.object(interpreterProj, "Parser", side_effect=AssertionError):
+            cached = parse_program(self.TEXT, Interpreter(), self.cache)
+        self.assertEqual(repr(cached), repr(statements))
+        self.assertEqual(Interpreter().interpret(cached), ["defined successfully", 3])
+
+    def test_key_changes_with_text_functions_and_version(self):
+        interpreter = Interpreter()
+        key = self.cache.key(self.TEXT, interpreter)
+        self.assertNotEqual(self.cache.key(self.TEXT + " ", interpreter), key)
+        with mock.patch.object(interpreterProj, "INTERPRETER_VERSION", "old"):
+            self.assertNotEqual(self.cache.key(self.TEXT, interpreter), key)
+        # the parser reads calls of defined functions differently
+        run(interpreter, ["Defun (Sub,a,b)a-b"])
+        self.assertNotEqual(self.cache.key(self.TEXT, interpreter), key)
+
+    def test_entry_of_another_version_is_parsed_again(self):
+        key = self.cache.key(self.TEXT, Interpreter())
+        with mock.patch.object(interpreterProj, "INTERPRETER_VERSION", "old"):
+            self.cache.put(key, parse_program(self.TEXT, Interpreter()))
+        self.assertIsNone(self.cache.get(key))
+
+    def test_damaged_entry_is_parsed_again(self):
+        key = self.cache.key(self.TEXT, Interpreter())
+        with open(self.cache.path(key), "wb") as file:
+            file.write(b"not a program")
+        self.assertIsNone(self.cache.get(key))
+        statements = parse_program(self.TEXT, Interpreter(), self.cache)
+        self.assertEqual(repr(self.cache.get(key)), repr(statements))
+
+    def test_least_recently_used_entries_are_evicted(self):
+        statements = parse_program(self.TEXT, Interpreter())
+        self.cache.put("a", statements)
+        self.cache.max_bytes = 2 * os.path.getsize(self.cache.path("a"))
+        self.cache.put("b", statements)
+        os.utime(self.cache.path("a"), (1000, 1000))
+        os.utime(self.cache.path("b"), (2000, 2000))
+        # reading a marks it as the most recently used entry
+        self.assertIsNotNone(self.cache.get("a"))
+        self.cache.put("c", statements)
+        self.assertIsNone(self.cache.get("b"))
+        self.assertIsNotNone(self.cache.get("a"))
+        self.assertIsNotNone(self.cache.get("c"))
+
+
+class BytecodeFileTest(unittest.TestCase):
+    PROGRAM = [
+        "Defun (Add,a,b)a+b",
+        "Defun (Factorial, n)(n == 1) or (n * Factorial(n - 1))",
+        "Defun (repeat,n)(n==0) or (repeat(n-1) , Add(1,1))",
+        "Add(2,1)",
+        "Factorial(10)",
+        "repeat(3)",
+        "Add(2,True)",
+        "not False",
+    ]
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def write(self, name, text):
+        with open(self.path(name), "w") as file:
+            file.write(text)
+
+    def run_files(self, *names):
+        vm = VM()
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            results = [vm.run(load_bytecode(self.path(name))) for name in names]
+        return results, out.getvalue()
+
+    def test_round_trip_runs_like_the_closures(self):
+        vm = VM()
+        statements = []
+        for text in self.PROGRAM:
+            statements += Parser(Lexer(text), vm).parse()
+            # a later statement only parses once the Defuns before it ran
+            with contextlib.redirect_stdout(io.StringIO()):
+                vm.interpret(statements[-1:])
+        dump_bytecode(compile_bytecode(statements), self.path("program.lambdac"))
+
+        results, printed = self.run_files("program.lambdac")
+        expected = run(Interpreter(), self.PROGRAM)
+        self.assertEqual([result for result in results[0] if result is not None], expected[0])
+        self.assertEqual(printed, expected[1])
+
+    def test_other_files_are_rejected(self):
+        self.write("text.lambdac", "Add(1,2)")
+        with self.assertRaises(ValueError):
+            load_bytecode(self.path("text.lambdac"))
+
+        statements = Parser(Lexer("1 + 2"), VM()).parse()
+        with mock.patch.object(interpreterProj, "BYTECODE_VERSION", 0):
+            dump_bytecode(compile_bytecode(statements), self.path("old.lambdac"))
+        with self.assertRaises(ValueError):
+            load_bytecode(self.path("old.lambdac"))
+
+    def test_later_files_compile_against_earlier_ones(self):
+        self.write("fns.lambda", "Defun (Add,a,b)a+b;\nDefun (Sq,a) a*a\n")
+        self.write("use.lambda", "1 + Sq(Add(1,2))\n")
+        vm = VM()
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertTrue(compile_file(self.path("fns.lambda"), vm, Optimizer()))
+            self.assertTrue(compile_file(self.path("use.lambda"), vm, Optimizer()))
+        results, _ = self.run_files("fns.lambdac", "use.lambdac")
+        self.assertEqual(results, [["defined successfully", "defined successfully"], [10]])
+
+
+if __name__ == "__main__":
+    unittest.main()